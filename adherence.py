@@ -0,0 +1,89 @@
+import numpy as np
+
+# Hari dinyatakan sebagai jumlah hari sejak 1970-01-01 (datetime64[D]); hari ke-0 adalah Kamis.
+# Weekday mengikuti Python dan jadwal_ttd: 0 = Senin.
+EPOCH_WEEKDAY = 3
+
+
+def weekdays(days):
+    return (np.asarray(days) + EPOCH_WEEKDAY) % 7
+
+
+def ratio(taken, expected):
+    """taken / expected per elemen; NaN jika tidak ada dosis yang dijadwalkan."""
+    taken = np.asarray(taken, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(expected > 0, taken / expected, np.nan)
+
+
+def expected_doses(masks, start_days, period_start, n_days):
+    """Matriks boolean pengguna x hari: True jika hari itu dijadwalkan minum TTD.
+
+    Hari sebelum start_days pengguna (misalnya tanggal daftar) tidak dihitung.
+    """
+    days = period_start + np.arange(n_days)
+    scheduled = ((masks[:, None] >> weekdays(days)[None, :]) & 1).astype(bool)
+    scheduled &= days[None, :] >= start_days[:, None]
+    return scheduled
+
+
+def taken_doses(scheduled, log_user_index, log_days, period_start):
+    """Menandai dosis terjadwal yang punya log 'Diminum'; dosis di luar jadwal diabaikan."""
+    taken = np.zeros_like(scheduled)
+    offset = np.asarray(log_days) - period_start
+    inside = (offset >= 0) & (offset < scheduled.shape[1])
+    taken[log_user_index[inside], offset[inside]] = True
+    return taken & scheduled
+
+
+def compute_adherence(user_ids, masks, start_days, log_user_ids, log_days, period_start, period_end, cohorts=None):
+    """Menghitung kepatuhan TTD (dosis diminum / dosis terjadwal) untuk seluruh populasi sekaligus.
+
+    Semua input berupa array: satu elemen per pengguna (user_ids, masks, start_days, cohorts)
+    atau per log 'Diminum' (log_user_ids, log_days). Periode dibagi per minggu mulai period_start;
+    minggu terakhir bisa kurang dari 7 hari.
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    masks = np.asarray(masks, dtype=np.int64)
+    start_days = np.asarray(start_days, dtype=np.int64)
+    log_user_ids = np.asarray(log_user_ids, dtype=np.int64)
+    log_days = np.asarray(log_days, dtype=np.int64)
+
+    # Posisi pemilik setiap log di array pengguna; log milik pengguna yang tidak dikenal dibuang
+    order = np.argsort(user_ids)
+    position = np.searchsorted(user_ids, log_user_ids, sorter=order).clip(0, max(len(user_ids) - 1, 0))
+    known = user_ids[order][position] == log_user_ids if len(user_ids) else np.zeros(len(log_user_ids), dtype=bool)
+    log_user_index = order[position[known]]
+    log_days = log_days[known]
+
+    n_weeks = -(-(period_end - period_start + 1) // 7)
+    n_days = n_weeks * 7
+    scheduled = expected_doses(masks, start_days, period_start, n_days)
+    scheduled[:, period_end - period_start + 1:] = False
+    taken = taken_doses(scheduled, log_user_index, log_days, period_start)
+
+    weekly_expected = scheduled.reshape(len(user_ids), n_weeks, 7).sum(axis=2, dtype=np.int32)
+    weekly_taken = taken.reshape(len(user_ids), n_weeks, 7).sum(axis=2, dtype=np.int32)
+    expected = weekly_expected.sum(axis=1)
+    taken_total = weekly_taken.sum(axis=1)
+
+    result = {
+        'user_ids': user_ids,
+        'expected': expected,
+        'taken': taken_total,
+        'ratio': ratio(taken_total, expected),
+        'user_weekly_ratio': ratio(weekly_taken, weekly_expected),
+        'week_starts': period_start + 7 * np.arange(n_weeks),
+        'weekly_ratio': ratio(weekly_taken.sum(axis=0), weekly_expected.sum(axis=0)),
+        'overall_ratio': float(ratio(taken_total.sum(), expected.sum())),
+    }
+    if cohorts is not None:
+        labels, cohort_index = np.unique(np.asarray(cohorts), return_inverse=True)
+        result['cohorts'] = labels
+        result['cohort_users'] = np.bincount(cohort_index, minlength=len(labels))
+        result['cohort_ratio'] = ratio(
+            np.bincount(cohort_index, weights=taken_total, minlength=len(labels)),
+            np.bincount(cohort_index, weights=expected, minlength=len(labels))
+        )
+    return result
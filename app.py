@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, send_from_directory
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
@@ -9,22 +9,61 @@ from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from scipy import stats, linalg
 import os
+import io
+import json
+import csv
+import time
+import base64
+import threading
+import hashlib
+import bleach
+import click
 import mistune
-from sqlalchemy import func
+import numpy as np
+from sqlalchemy import func, and_, or_, insert, select, update, literal, case
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import validates
+from cache import create_cache
+from hashing import PasswordHasher, HashingBusy, hash_passwords_parallel
+import zscore
+import adherence
+import risk
 
 
 # --- KONFIGURASI APLIKASI ---
 app = Flask(__name__)
-app.config['SECRET_KEY'] = '' 
-app.config['SQLALCHEMY_DATABASE_URI'] = ''
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', '')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', '')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=1)
+# Cache respons artikel & kuis: 'redis' (dipakai bersama semua worker) atau 'memory'.
+# 'memory' menyimpan versi namespace per proses, sehingga invalidasi di satu worker tidak terlihat
+# di worker lain; hanya untuk development/satu worker dan ditolak jika WEB_CONCURRENCY > 1.
+# Jika Redis tidak bisa dihubungi, cache dilewati dan data dibaca langsung dari database (lihat RedisCache).
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'redis')
+app.config['CACHE_WORKER_COUNT'] = int(os.environ.get('WEB_CONCURRENCY', 1))
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['CACHE_DEFAULT_TTL'] = 300
+# Cost bcrypt dan batas pool hashing password, per proses gunicorn (lihat hashing.py).
+# Antrean hanya berarti jika satu proses melayani beberapa request sekaligus (worker gthread/gevent,
+# lihat Procfile); worker + antrean harus lebih kecil dari --threads agar penolakan 503 bisa terjadi.
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 4))
 
 # Inisialisasi ekstensi
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
+response_cache = create_cache(app.config)
+password_hasher = PasswordHasher(
+    bcrypt,
+    rounds=app.config['BCRYPT_LOG_ROUNDS'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_queue=app.config['PASSWORD_HASH_QUEUE']
+)
 
 # --- MODEL DATABASE ---
 class HomePageContent(db.Model):
@@ -32,6 +71,9 @@ class HomePageContent(db.Model):
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     image_filename = db.Column(db.String(255), nullable=True)
+    # HTML hasil render Markdown, diperbarui setiap kali konten disimpan
+    content_html = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
     
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -41,34 +83,65 @@ class Admin(db.Model):
 
     def __init__(self, username, password, role='ahli'):
         self.username = username
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
         self.role = role
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
 class RemajaPutri(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    points = db.Column(db.Integer, default=0) 
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Hanya diubah lewat award_points() agar selalu atomik dan tercatat di PointsLedger
+    points = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     fcm_token = db.Column(db.String(255), nullable=True, unique=True)
     profile_image_filename = db.Column(db.String(255), nullable=True)
     # --- JADWAL MINUM TTD ---
     # Menyimpan hari dalam seminggu (0=Senin, 1=Selasa, dst.)
     # Disimpan sebagai string yang dipisahkan koma, misal: "0" atau "0,3"
     jadwal_ttd = db.Column(db.String(20), default='0', nullable=False) # Default: Setiap Senin
+    # Jadwal yang sama dalam bentuk bitmask (bit ke-n = hari ke-n) agar bisa difilter di SQL
+    jadwal_ttd_mask = db.Column(db.Integer, default=1, nullable=False)
+    # Streak dosis 'Diminum' berturut-turut sesuai jadwal, diperbarui oleh update_streak()
+    current_streak = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    longest_streak = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    last_log_date = db.Column(db.Date, nullable=True)
     tanggal_lahir = db.Column(db.Date, nullable=True) 
     jenis_kelamin = db.Column(db.String(1), nullable=True) 
     logs = db.relationship('DailyLog', backref='pemilik', lazy=True)
 
+    __table_args__ = (
+        # Urutan leaderboard: poin tertinggi dulu, lalu id
+        db.Index('ix_remaja_putri_points_id', 'points', 'id'),
+    )
+
     def __init__(self, username, password):
         self.username = username
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    @validates('jadwal_ttd')
+    def sync_jadwal_ttd_mask(self, key, value):
+        self.jadwal_ttd_mask = jadwal_to_mask(value)
+        return value
+
+def jadwal_to_mask(jadwal):
+    """Mengubah jadwal seperti "0,3" (Senin & Kamis) menjadi bitmask 0b1001."""
+    mask = 0
+    for day in (jadwal or '').split(','):
+        day = day.strip()
+        if day.isdigit() and int(day) < 7:
+            mask |= 1 << int(day)
+    return mask
+
+def is_valid_jadwal(jadwal):
+    """True jika jadwal hanya berisi nomor hari 0-6 dipisah koma dan muat di kolom jadwal_ttd."""
+    days = [day.strip() for day in jadwal.split(',')]
+    return len(jadwal) <= 20 and all(day.isdigit() and int(day) < 7 for day in days)
 
 # Di app.py, ganti class DailyLog yang lama dengan ini:
 
@@ -88,6 +161,13 @@ class DailyLog(db.Model):
 
     catatan_makan = db.Column(db.String(200), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Hanya satu log per hari untuk setiap pengguna
+        db.UniqueConstraint('user_id', 'tanggal', name='uq_daily_log_user_id_tanggal'),
+        db.Index('ix_daily_log_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     
 class Article(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -95,7 +175,18 @@ class Article(db.Model):
     content = db.Column(db.Text, nullable=False)
     image_filename = db.Column(db.String(255), nullable=True)
     video_url = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Ringkasan disimpan saat artikel disimpan agar daftar artikel tidak perlu memuat 'content'
+    snippet = db.Column(db.String(255), nullable=True)
+    word_count = db.Column(db.Integer, default=0, nullable=False)
+    content_html = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+
+    def refresh_summary(self):
+        """Menghitung ulang snippet dan jumlah kata dari konten artikel."""
+        content = self.content or ''
+        self.snippet = content[:100] + '...' if len(content) > 100 else content
+        self.word_count = len(content.split())
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -105,6 +196,13 @@ class Question(db.Model):
     answered_by = db.Column(db.String(80), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_question_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_question_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_question_status_created_at', 'status', 'created_at'),
+    )
 
 # Tabel untuk mendefinisikan semua lencana yang tersedia
 class Badge(db.Model):
@@ -120,6 +218,11 @@ class UserBadge(db.Model):
     badge_id = db.Column(db.Integer, db.ForeignKey('badge.id'), nullable=False)
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Satu lencana hanya bisa dimiliki sekali oleh setiap pengguna
+        db.UniqueConstraint('user_id', 'badge_id', name='uq_user_badge_user_id_badge_id'),
+    )
+
 # Model untuk kategori/topik di dalam forum
 class ForumTopic(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -134,11 +237,18 @@ class ForumPost(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), nullable=False)
     topic_id = db.Column(db.Integer, db.ForeignKey('forum_topic.id'), nullable=False)
+    # Denormalisasi agar daftar thread tidak perlu menghitung balasan per baris
+    reply_count = db.Column(db.Integer, default=0, nullable=False)
+    last_reply_at = db.Column(db.DateTime, nullable=True)
     
     # Relasi untuk mendapatkan nama user dan jumlah balasan
     user = db.relationship('RemajaPutri', backref='forum_posts')
     replies = db.relationship('ForumReply', backref='post', lazy='dynamic', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_forum_post_topic_id_created_at', 'topic_id', 'created_at'),
+    )
+
 # Model untuk balasan dalam sebuah postingan
 class ForumReply(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -149,11 +259,15 @@ class ForumReply(db.Model):
     
     # Relasi untuk mendapatkan nama user
     user = db.relationship('RemajaPutri', backref='forum_replies')
+
+    __table_args__ = (
+        db.Index('ix_forum_reply_post_id_created_at', 'post_id', 'created_at'),
+    )
     
 # Model untuk Log Asupan Gizi Harian
 class NutritionLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    tanggal = db.Column(db.Date, nullable=False, unique=True) # Hanya satu log per hari
+    tanggal = db.Column(db.Date, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), nullable=False)
     
     # Komponen "Piring Makanku"
@@ -166,6 +280,13 @@ class NutritionLog(db.Model):
     # Komponen Tambahan
     camilan_manis = db.Column(db.Integer, default=0) # Untuk menghitung berapa kali
     minuman_manis = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Hanya satu log per hari untuk setiap pengguna
+        db.UniqueConstraint('user_id', 'tanggal', name='uq_nutrition_log_user_id_tanggal'),
+        db.Index('ix_nutrition_log_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     
 # Model untuk Skrining Kesehatan Berkala
 class HealthScreening(db.Model):
@@ -182,19 +303,25 @@ class HealthScreening(db.Model):
     # Data Lainnya
     kadar_hb = db.Column(db.Float, nullable=True) # dalam g/dL
     riwayat_haid = db.Column(db.String(255), nullable=True) # Teks singkat
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_health_screening_user_id_tanggal_skrining', 'user_id', 'tanggal_skrining'),
+        db.Index('ix_health_screening_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
 # Model untuk menghubungkan Artikel dengan Kuis
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     article_id = db.Column(db.Integer, db.ForeignKey('article.id'), unique=True, nullable=False)
-    questions = db.relationship('QuizQuestion', backref='quiz', lazy=True, cascade="all, delete-orphan")
+    questions = db.relationship('QuizQuestion', backref='quiz', lazy=True, cascade="all, delete-orphan", order_by='QuizQuestion.id')
 
 # Model untuk satu pertanyaan dalam sebuah kuis
 class QuizQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
     question_text = db.Column(db.String(500), nullable=False)
-    choices = db.relationship('QuizChoice', backref='question', lazy=True, cascade="all, delete-orphan")
+    choices = db.relationship('QuizChoice', backref='question', lazy=True, cascade="all, delete-orphan", order_by='QuizChoice.id')
 
 # Model untuk pilihan jawaban dalam sebuah pertanyaan
 class QuizChoice(db.Model):
@@ -210,7 +337,129 @@ class UserQuizAttempt(db.Model):
     quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
     score = db.Column(db.Integer, nullable=False) # Skor (misal: 80, 100)
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Kunci idempotensi setiap entri /sync yang sudah diproses, agar pengiriman ulang tidak diterapkan dua kali
+class SyncReceipt(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), primary_key=True)
+    idempotency_key = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    result = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Riwayat setiap perubahan poin pengguna; jumlah delta per user sama dengan RemajaPutri.points
+class PointsLedger(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_points_ledger_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+# Penghitung aktivitas per pengguna (misal 'forum_reply'), dasar evaluasi aturan lencana
+class UserCounter(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, default=0, nullable=False)
+
+# Statistik setiap kali send_reminders.py dijalankan
+class ReminderRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    batch_count = db.Column(db.Integer, default=0, nullable=False)
+    token_count = db.Column(db.Integer, default=0, nullable=False)
+    success_count = db.Column(db.Integer, default=0, nullable=False)
+    failure_count = db.Column(db.Integer, default=0, nullable=False)
+    pruned_count = db.Column(db.Integer, default=0, nullable=False)
+
+# Posisi terakhir job backfill agar bisa dilanjutkan setelah berhenti
+class BackfillCheckpoint(db.Model):
+    name = db.Column(db.String(100), primary_key=True)
+    last_id = db.Column(db.Integer, default=0, nullable=False)
+    processed_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Hasil terakhir `flask score-anemia-risk` (dijalankan tiap malam), satu baris per pengguna
+class RiskScore(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('remaja_putri.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(10), nullable=False)
+    # Input yang dipakai saat skor dihitung, untuk ditampilkan di halaman admin
+    kadar_hb = db.Column(db.Float, nullable=True)
+    bmi_zscore = db.Column(db.Float, nullable=True)
+    adherence = db.Column(db.Float, nullable=True)
+    nutrition = db.Column(db.Float, nullable=True)
+    computed_at = db.Column(db.DateTime, nullable=False)
+    user = db.relationship('RemajaPutri')
+
+    __table_args__ = (
+        # Urutan halaman admin: risiko tertinggi dulu, bisa difilter per kategori
+        db.Index('ix_risk_score_score_user_id', 'score', 'user_id'),
+        db.Index('ix_risk_score_category_score_user_id', 'category', 'score', 'user_id'),
+    )
+
+# Hasil terakhir laporan agregat yang dihitung lewat CLI/cron (misalnya `flask compute-adherence`)
+class ReportSnapshot(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+# --- TABEL REKAP (ROLLUP) UNTUK HALAMAN LAPORAN ---
+# Diperbarui di add_log/submit_quiz, dapat dihitung ulang dengan `flask rebuild-rollups`
+class DailyStatusRollup(db.Model):
+    tanggal = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    log_count = db.Column(db.Integer, default=0, nullable=False)
+
+class QuizAttemptRollup(db.Model):
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Integer, default=0, nullable=False)
+
+def upsert_counters(model, keys, values, combine):
+    """Upsert baris `keys`; kolom yang sudah ada diisi combine(nilai lama, nilai baru) di SQL."""
+    table = model.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table).values(**keys, **values)
+        stmt = stmt.on_duplicate_key_update({name: combine(table.c[name], stmt.inserted[name]) for name in values})
+    else:
+        dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(table).values(**keys, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: combine(table.c[name], stmt.excluded[name]) for name in values}
+        )
+    db.session.execute(stmt)
+
+def increment_counters(model, keys, **deltas):
+    """Menambahkan deltas ke baris `keys` milik model secara atomik (upsert).
+
+    Baris dibuat jika belum ada. Dijalankan di transaksi sesi yang sedang berjalan.
+    """
+    upsert_counters(model, keys, deltas, lambda current, delta: current + delta)
+
+def raise_counters(model, keys, **values):
+    """Menaikkan kolom ke `values` hanya jika lebih besar (GREATEST), secara atomik (upsert).
+
+    Nilai tidak pernah turun, sehingga aman dijalankan bersamaan. Baris dibuat jika belum ada.
+    """
+    # SQLite tidak punya GREATEST; MAX dengan dua argumen di sana adalah fungsi skalar
+    greatest = func.max if db.session.get_bind().dialect.name == 'sqlite' else func.greatest
+    upsert_counters(model, keys, values, greatest)
     
+def insert_ignore(model):
+    """INSERT untuk tabel model yang melewati baris pelanggar unique constraint."""
+    table = model.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == 'mysql':
+        return mysql.insert(table).prefix_with('IGNORE')
+    dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    return dialect_insert(table).on_conflict_do_nothing()
+
 # --- Level akun flutter ---
 def get_user_level(points):
     """Menentukan level dan gelar pengguna berdasarkan poin."""
@@ -221,14 +470,473 @@ def get_user_level(points):
     else:
         return "Pemula Gizi"
 
+# --- POIN & LEADERBOARD ---
+# Jumlah peringkat teratas yang disimpan di cache leaderboard
+LEADERBOARD_CACHE_SIZE = 50
+LEADERBOARD_CACHE_TTL = 60
+
+def award_points(user_id, delta, reason):
+    """Menambah poin secara atomik di SQL dan mencatatnya di PointsLedger.
+
+    Dijalankan di transaksi sesi yang sedang berjalan; panggil refresh_leaderboard_entry() setelah commit.
+    """
+    db.session.add(PointsLedger(user_id=user_id, delta=delta, reason=reason))
+    RemajaPutri.query.filter_by(id=user_id).update(
+        {RemajaPutri.points: RemajaPutri.points + delta}, synchronize_session=False
+    )
+
+def leaderboard_entry(entry, rank):
+    return {
+        'rank': rank,
+        'user_id': entry['id'],
+        'username': entry['username'],
+        'points': entry['points'],
+        'level_title': get_user_level(entry['points'])
+    }
+
+def load_leaderboard_top():
+    """Peringkat teratas dari cache; dibaca lewat index (points, id) jika cache kosong."""
+    def build_top():
+        rows = db.session.query(RemajaPutri.id, RemajaPutri.username, RemajaPutri.points).order_by(
+            RemajaPutri.points.desc(), RemajaPutri.id.desc()
+        ).limit(LEADERBOARD_CACHE_SIZE).all()
+        return [row._asdict() for row in rows]
+    return response_cache.get_or_set('leaderboard', 'top', build_top, ttl=LEADERBOARD_CACHE_TTL)
+
+def refresh_leaderboard_entry(user_id):
+    """Memperbarui satu pengguna di cache peringkat teratas tanpa membangun ulang seluruhnya."""
+    top = response_cache.get('leaderboard', 'top')
+    if top is None:
+        return
+    user = db.session.query(RemajaPutri.id, RemajaPutri.username, RemajaPutri.points).filter_by(id=user_id).first()
+    if user is None:
+        return
+
+    was_listed = any(entry['id'] == user_id for entry in top)
+    entries = [entry for entry in top if entry['id'] != user_id]
+    is_full = len(top) >= LEADERBOARD_CACHE_SIZE
+    qualifies = not is_full or (user.points, user.id) > (top[-1]['points'], top[-1]['id'])
+    if was_listed and is_full and not qualifies:
+        # Pengguna turun keluar dari daftar; penggantinya tidak diketahui tanpa query ulang
+        response_cache.invalidate('leaderboard')
+        return
+    if not (was_listed or qualifies):
+        return
+
+    entries.append(user._asdict())
+    entries.sort(key=lambda entry: (entry['points'], entry['id']), reverse=True)
+    response_cache.set('leaderboard', 'top', entries[:LEADERBOARD_CACHE_SIZE], ttl=LEADERBOARD_CACHE_TTL)
+
+def leaderboard_rank(user):
+    """Peringkat satu pengguna.
+
+    Pengguna yang ada di cache peringkat teratas langsung dibaca dari sana. Di luar itu peringkat
+    dihitung dari rentang index (points, id) di atasnya, lalu di-cache selama LEADERBOARD_CACHE_TTL.
+    """
+    for rank, entry in enumerate(load_leaderboard_top(), start=1):
+        if entry['id'] == user.id and entry['points'] == user.points:
+            return rank
+
+    def count_rank():
+        ahead = RemajaPutri.query.filter(
+            keyset_after(RemajaPutri.points, RemajaPutri.id, user.points, user.id)
+        ).count()
+        return ahead + 1
+    return response_cache.get_or_set('leaderboard', f'rank:{user.id}:{user.points}', count_rank, ttl=LEADERBOARD_CACHE_TTL)
+
+# --- LENCANA (BADGE) ---
+# Setiap aturan memberi lencana saat penghitung `counter` milik pengguna mencapai `threshold`.
+# Aturan baru cukup ditambahkan di sini lalu jalankan `flask evaluate-badges` untuk data lama.
+BADGE_RULES = [
+    {'name': 'Langkah Pertama', 'description': 'Mencatat minum TTD untuk pertama kali',
+     'icon_name': 'emoji_events', 'counter': 'log_ttd', 'threshold': 1},
+    {'name': 'Rutin 7 Hari', 'description': 'Minum TTD 7 kali berturut-turut sesuai jadwal',
+     'icon_name': 'local_fire_department', 'counter': 'streak_max', 'threshold': 7},
+    {'name': 'Rutin 30 Hari', 'description': 'Minum TTD 30 kali berturut-turut sesuai jadwal',
+     'icon_name': 'whatshot', 'counter': 'streak_max', 'threshold': 30},
+    {'name': 'Nilai Sempurna', 'description': 'Mendapat nilai 100 pada kuis untuk pertama kali',
+     'icon_name': 'star', 'counter': 'quiz_perfect', 'threshold': 1},
+    {'name': 'Rajin Belajar', 'description': 'Menyelesaikan 10 kuis',
+     'icon_name': 'school', 'counter': 'quiz_attempt', 'threshold': 10},
+    {'name': 'Sahabat Forum', 'description': 'Mengirim 10 balasan di forum',
+     'icon_name': 'forum', 'counter': 'forum_reply', 'threshold': 10},
+    {'name': 'Peduli Kesehatan', 'description': 'Melakukan skrining kesehatan 3 kali',
+     'icon_name': 'monitor_heart', 'counter': 'screening', 'threshold': 3},
+]
+
+def badge_ids(names):
+    """Peta nama lencana -> id untuk `names`.
+
+    Dibaca langsung dari database (bukan response_cache) karena dipakai di dalam transaksi tulis;
+    hanya dipanggil saat ada ambang yang terlewati. Baris Badge dibuat oleh migrasi, atau oleh
+    `flask evaluate-badges` untuk aturan baru.
+    """
+    return dict(db.session.query(Badge.name, Badge.id).filter(Badge.name.in_(names)).all())
+
+def record_activity(user_id, increments=None, maxima=None):
+    """Memperbarui penghitung aktivitas pengguna dan memberi lencana yang ambangnya baru terlewati.
+
+    `increments` ditambahkan ke penghitung, `maxima` hanya disimpan jika lebih besar dari nilai lama
+    (misal streak terpanjang). Dijalankan di transaksi sesi yang sedang berjalan.
+    """
+    increments = {name: delta for name, delta in (increments or {}).items() if delta}
+    maxima = maxima or {}
+    names = set(increments) | set(maxima)
+    counters = db.session.query(UserCounter.name, UserCounter.value).filter(
+        UserCounter.user_id == user_id, UserCounter.name.in_(names)
+    )
+    old_values = dict(counters.all())
+
+    # Perubahan dilakukan di SQL (tambah / GREATEST), bukan dari nilai lama yang dibaca di atas
+    for name, delta in increments.items():
+        increment_counters(UserCounter, {'user_id': user_id, 'name': name}, value=delta)
+    for name, value in maxima.items():
+        if value > old_values.get(name, 0):
+            raise_counters(UserCounter, {'user_id': user_id, 'name': name}, value=value)
+    # Dibaca ulang dengan lock baris agar permintaan bersamaan melihat nilai akhir masing-masing
+    new_values = dict(counters.with_for_update().all())
+
+    crossed = [
+        rule['name'] for rule in BADGE_RULES
+        if rule['counter'] in new_values and old_values.get(rule['counter'], 0) < rule['threshold'] <= new_values[rule['counter']]
+    ]
+    if not crossed:
+        return crossed
+    ids = badge_ids(crossed)
+    # Lencana yang barisnya belum dibuat akan diberikan saat `flask evaluate-badges` dijalankan
+    rows = [{'user_id': user_id, 'badge_id': ids[name], 'earned_at': datetime.utcnow()} for name in crossed if name in ids]
+    if rows:
+        db.session.execute(insert_ignore(UserBadge), rows)
+    return crossed
+
+# --- STREAK TTD ---
+# Streak = jumlah dosis 'Diminum' berturut-turut tanpa melewatkan hari yang dijadwalkan (jadwal_ttd_mask).
+# Dosis di luar jadwal tetap dihitung, sedangkan hari tanpa jadwal tidak memutus streak.
+
+def missed_scheduled_day(mask, previous_date, next_date):
+    """True jika ada hari terjadwal di antara previous_date dan next_date (keduanya tidak termasuk)."""
+    between = min((next_date - previous_date).days - 1, 7)
+    if between <= 0:
+        return False
+    # Bit hari-hari di antaranya, diputar mulai dari hari setelah previous_date
+    window = ((1 << between) - 1) << ((previous_date.weekday() + 1) % 7)
+    return bool((window | (window >> 7)) & 0x7F & mask)
+
+def update_streak(user, tanggal):
+    """Memperbarui streak pengguna dalam O(1) untuk dosis 'Diminum' baru pada tanggal."""
+    if user.last_log_date is not None and tanggal <= user.last_log_date:
+        return
+    if user.last_log_date is None or missed_scheduled_day(user.jadwal_ttd_mask, user.last_log_date, tanggal):
+        user.current_streak = 1
+    else:
+        user.current_streak += 1
+    user.longest_streak = max(user.longest_streak, user.current_streak)
+    user.last_log_date = tanggal
+
+def streak_as_of(user, today_date):
+    """Streak yang ditampilkan: 0 jika sejak log terakhir sudah ada hari terjadwal yang terlewat."""
+    if user.last_log_date is None or missed_scheduled_day(user.jadwal_ttd_mask, user.last_log_date, today_date):
+        return 0
+    return user.current_streak
+
+def compute_streaks(user_ids, days, masks):
+    """Versi vektor dari update_streak untuk banyak log sekaligus.
+
+    Input berupa array log 'Diminum' yang unik dan terurut (user_id, hari sejak 1970-01-01) beserta
+    jadwal_ttd_mask pemiliknya. Mengembalikan (user_id, streak terakhir, streak terpanjang, hari log terakhir).
+    """
+    n = len(days)
+    index = np.arange(n)
+    first = np.ones(n, dtype=bool)
+    first[1:] = user_ids[1:] != user_ids[:-1]
+
+    between = np.zeros(n, dtype=np.int64)
+    between[1:] = np.clip(days[1:] - days[:-1] - 1, 0, 7)
+    start = np.zeros(n, dtype=np.int64)
+    start[1:] = (days[:-1] + 3 + 1) % 7  # 1970-01-01 adalah hari Kamis (weekday 3)
+    window = ((1 << between) - 1) << start
+    missed = ((window | (window >> 7)) & 0x7F & masks) != 0
+
+    run_start = np.maximum.accumulate(np.where(first | missed, index, 0))
+    run = index - run_start + 1
+    user_start = np.flatnonzero(first)
+    user_last = np.append(user_start[1:] - 1, n - 1)
+    return user_ids[user_last], run[user_last], np.maximum.reduceat(run, user_start), days[user_last]
+
+def rebuild_streaks(user_ids=None):
+    """Menghitung ulang streak semua pengguna (atau user_ids saja) dari riwayat DailyLog."""
+    logs = db.session.query(DailyLog.user_id, DailyLog.tanggal).filter(DailyLog.status == 'Diminum')
+    users = db.session.query(RemajaPutri.id, RemajaPutri.jadwal_ttd_mask)
+    reset = RemajaPutri.query
+    if user_ids is not None:
+        logs = logs.filter(DailyLog.user_id.in_(user_ids))
+        users = users.filter(RemajaPutri.id.in_(user_ids))
+        reset = reset.filter(RemajaPutri.id.in_(user_ids))
+    rows = logs.distinct().order_by(DailyLog.user_id, DailyLog.tanggal).all()
+    mask_of = dict(users.all())
+
+    reset.update({RemajaPutri.current_streak: 0, RemajaPutri.longest_streak: 0, RemajaPutri.last_log_date: None},
+                 synchronize_session=False)
+    if not rows:
+        return 0
+
+    log_users = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    days = np.array([row[1] for row in rows], dtype='datetime64[D]').astype(np.int64)
+    masks = np.fromiter((mask_of.get(row[0], 0) for row in rows), dtype=np.int64, count=len(rows))
+    ids, current, longest, last_days = compute_streaks(log_users, days, masks)
+
+    last_dates = last_days.astype('datetime64[D]').astype(object)
+    updates = [
+        {'id': int(user_id), 'current_streak': int(cur), 'longest_streak': int(best), 'last_log_date': last_date}
+        for user_id, cur, best, last_date in zip(ids, current, longest, last_dates)
+    ]
+    for offset in range(0, len(updates), STREAM_CHUNK_SIZE):
+        db.session.execute(update(RemajaPutri), updates[offset:offset + STREAM_CHUNK_SIZE])
+    return len(updates)
+
+# --- KEPATUHAN TTD TERJADWAL ---
+# Kepatuhan = dosis 'Diminum' pada hari terjadwal / jumlah hari terjadwal sejak pengguna mendaftar.
+ADHERENCE_PERIOD_DAYS = 84
+# Batas bawah rasio untuk distribusi kepatuhan pengguna, dari yang tertinggi
+ADHERENCE_BUCKETS = [(0.8, 'Patuh (≥ 80%)'), (0.5, 'Sebagian (50–79%)'), (0.0, 'Rendah (< 50%)')]
+
+def load_adherence(period_start, period_end):
+    """Memuat jadwal semua pengguna dan log 'Diminum' periode ini sebagai array, lalu menghitung kepatuhannya."""
+    users = db.session.query(RemajaPutri.id, RemajaPutri.jadwal_ttd_mask, RemajaPutri.created_at).order_by(RemajaPutri.id).all()
+    logs = db.session.query(DailyLog.user_id, DailyLog.tanggal).filter(
+        DailyLog.status == 'Diminum', DailyLog.tanggal.between(period_start, period_end)
+    ).all()
+
+    # created_at kosong menjadi NaT: dihitung sejak awal periode dan masuk kohort 'NaT'
+    created = np.array([row.created_at for row in users], dtype='datetime64[D]')
+    return adherence.compute_adherence(
+        user_ids=np.fromiter((row.id for row in users), dtype=np.int64, count=len(users)),
+        masks=np.fromiter((row.jadwal_ttd_mask for row in users), dtype=np.int64, count=len(users)),
+        start_days=created.astype(np.int64),
+        log_user_ids=np.fromiter((row.user_id for row in logs), dtype=np.int64, count=len(logs)),
+        log_days=np.array([row.tanggal for row in logs], dtype='datetime64[D]').astype(np.int64),
+        period_start=np.datetime64(period_start, 'D').astype(np.int64),
+        period_end=np.datetime64(period_end, 'D').astype(np.int64),
+        cohorts=created.astype('datetime64[M]').astype(str)
+    )
+
+def ratio_or_none(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+def build_adherence_report(period_days=ADHERENCE_PERIOD_DAYS):
+    """Ringkasan kepatuhan seluruh populasi untuk dashboard admin; dijalankan dari `flask compute-adherence`."""
+    period_end = datetime.utcnow().date()
+    period_start = period_end - timedelta(days=period_days - 1)
+    result = load_adherence(period_start, period_end)
+
+    ratios = result['ratio'][~np.isnan(result['ratio'])]
+    thresholds = np.array([threshold for threshold, _ in ADHERENCE_BUCKETS])
+    bucket_index = (ratios[:, None] < thresholds[None, :]).sum(axis=1)
+    bucket_counts = np.bincount(bucket_index, minlength=len(ADHERENCE_BUCKETS))
+    return {
+        'period_start': period_start.isoformat(),
+        'period_end': period_end.isoformat(),
+        'computed_at': datetime.utcnow().isoformat(),
+        'overall': ratio_or_none(result['overall_ratio']),
+        'scheduled_users': int(len(ratios)),
+        'weekly': [
+            {'week_start': str(day), 'ratio': ratio_or_none(value)}
+            for day, value in zip(result['week_starts'].astype('datetime64[D]'), result['weekly_ratio'])
+        ],
+        'cohorts': [
+            {'cohort': str(label), 'users': int(users), 'ratio': ratio_or_none(value)}
+            for label, users, value in zip(result['cohorts'], result['cohort_users'], result['cohort_ratio'])
+        ],
+        'distribution': [
+            {'label': label, 'users': int(count)} for (_, label), count in zip(ADHERENCE_BUCKETS, bucket_counts)
+        ],
+    }
+
+def adherence_report():
+    """Laporan kepatuhan terakhir yang disimpan `flask compute-adherence`; None jika belum pernah dihitung."""
+    snapshot = db.session.get(ReportSnapshot, 'adherence')
+    return snapshot.data if snapshot else None
+
+# --- SKOR RISIKO ANEMIA ---
+# Kepatuhan TTD dan pola makan dihitung dari RISK_WINDOW_DAYS terakhir; Hb dan z-score IMT/U dari skrining terakhir.
+RISK_WINDOW_DAYS = 28
+
+def user_positions(user_ids, ids):
+    """Posisi setiap id di user_ids (terurut); -1 untuk id yang tidak ada."""
+    position = np.searchsorted(user_ids, ids).clip(0, max(len(user_ids) - 1, 0))
+    found = user_ids[position] == ids if len(user_ids) else np.zeros(len(ids), dtype=bool)
+    return np.where(found, position, -1)
+
+def nan_to_none(values):
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result.tolist()
+
+def load_risk_inputs(today_date):
+    """Memuat input skor risiko semua pengguna sebagai array kolom yang sejajar dengan user_ids."""
+    window_start = today_date - timedelta(days=RISK_WINDOW_DAYS - 1)
+    adherence_result = load_adherence(window_start, today_date)
+    user_ids = adherence_result['user_ids']
+    inputs = {
+        'user_ids': user_ids,
+        'kadar_hb': np.full(len(user_ids), np.nan),
+        'bmi_zscore': np.full(len(user_ids), np.nan),
+        'adherence': adherence_result['ratio'],
+        'nutrition': np.full(len(user_ids), np.nan),
+    }
+
+    # Nilai terakhir yang terisi per pengguna: baris terurut per pengguna lalu tanggal, ambil yang paling akhir
+    screenings = db.session.query(HealthScreening.user_id, HealthScreening.kadar_hb, HealthScreening.bmi_zscore).filter(
+        or_(HealthScreening.kadar_hb.isnot(None), HealthScreening.bmi_zscore.isnot(None))
+    ).order_by(HealthScreening.user_id, HealthScreening.tanggal_skrining, HealthScreening.id).all()
+    screening_users = user_positions(user_ids, np.fromiter((row.user_id for row in screenings), dtype=np.int64, count=len(screenings)))
+    for name in ('kadar_hb', 'bmi_zscore'):
+        values = np.array([getattr(row, name) for row in screenings], dtype=float)
+        present = ~np.isnan(values) & (screening_users >= 0)
+        owners, values = screening_users[present], values[present]
+        last = np.append(owners[1:] != owners[:-1], True)
+        inputs[name][owners[last]] = values[last]
+
+    # Pola makan: rata-rata porsi harian lauk hewani (sumber zat besi), sayur dan buah (vitamin C)
+    food_groups = (NutritionLog.lauk_hewani, NutritionLog.sayur, NutritionLog.buah)
+    nutrition = db.session.query(
+        NutritionLog.user_id, func.count(NutritionLog.id),
+        *(func.sum(case((column.is_(True), 1), else_=0)) for column in food_groups)
+    ).filter(NutritionLog.tanggal.between(window_start, today_date)).group_by(NutritionLog.user_id).all()
+    if nutrition:
+        totals = np.array([tuple(row) for row in nutrition], dtype=float)
+        owners = user_positions(user_ids, totals[:, 0].astype(np.int64))
+        known = owners >= 0
+        inputs['nutrition'][owners[known]] = (totals[known, 2:].sum(axis=1) / (len(food_groups) * totals[known, 1]))
+    return inputs
+
+def score_all_users(today_date=None):
+    """Menghitung skor risiko anemia semua pengguna dan mengganti seluruh isi tabel RiskScore."""
+    inputs = load_risk_inputs(today_date or datetime.utcnow().date())
+    score, category = risk.score_risk(inputs['kadar_hb'], inputs['bmi_zscore'], inputs['adherence'], inputs['nutrition'])
+
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': user_id, 'score': value, 'category': label, 'kadar_hb': hb, 'bmi_zscore': z,
+         'adherence': ratio, 'nutrition': food, 'computed_at': now}
+        for user_id, value, label, hb, z, ratio, food in zip(
+            inputs['user_ids'].tolist(), np.round(score, 2).tolist(), category.tolist(),
+            nan_to_none(inputs['kadar_hb']), nan_to_none(inputs['bmi_zscore']),
+            nan_to_none(np.round(inputs['adherence'], 4)), nan_to_none(np.round(inputs['nutrition'], 4))
+        )
+    ]
+    RiskScore.query.delete()
+    for offset in range(0, len(rows), STREAM_CHUNK_SIZE):
+        db.session.execute(insert(RiskScore), rows[offset:offset + STREAM_CHUNK_SIZE])
+    labels, counts = np.unique(category, return_counts=True)
+    return {str(label): int(count) for label, count in zip(labels, counts)}
+
+# --- RENDER MARKDOWN ---
+MARKDOWN_TAGS = bleach.sanitizer.ALLOWED_TAGS | {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'img',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td'
+}
+MARKDOWN_ATTRIBUTES = {'a': ['href', 'title'], 'img': ['src', 'alt', 'title']}
+
+def render_markdown(text):
+    """Mengubah Markdown menjadi HTML yang sudah dibersihkan dari tag berbahaya."""
+    return bleach.clean(mistune.html(text or ''), tags=MARKDOWN_TAGS, attributes=MARKDOWN_ATTRIBUTES)
+
+def refresh_rendered_html(obj):
+    """Render ulang content_html milik obj hanya jika isi Markdown-nya berubah."""
+    content_hash = hashlib.sha256((obj.content or '').encode('utf-8')).hexdigest()
+    if obj.content_html is None or obj.content_hash != content_hash:
+        obj.content_html = render_markdown(obj.content)
+        obj.content_hash = content_hash
+
+# --- PAGINASI BERBASIS CURSOR ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Jumlah baris yang diambil dari database per putaran saat respons di-stream
+STREAM_CHUNK_SIZE = 500
+
+def get_page_limit():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def encode_cursor(sort_value, row_id):
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Mengembalikan (sort_value, id) dari cursor. Melempar ValueError jika cursor rusak."""
+    sort_value, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(sort_value), int(row_id)
+
+# Token /changes hanyalah waktu server (UTC) saat respons sebelumnya dibuat
+def encode_sync_token(timestamp):
+    return base64.urlsafe_b64encode(timestamp.isoformat().encode()).decode()
+
+def decode_sync_token(token):
+    """Mengembalikan datetime dari token. Melempar ValueError jika token rusak."""
+    return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+
+def keyset_after(sort_col, id_col, last_value, last_id, descending=False):
+    """Filter baris sesudah (last_value, last_id) dalam urutan (sort_col, id_col).
+
+    Batas >=/<= pada sort_col membuat database bisa mencari langsung di index (..., sort_col, id),
+    bukan membaca index dari awal seperti pada bentuk OR saja.
+    """
+    if descending:
+        return and_(sort_col <= last_value, or_(sort_col < last_value, id_col < last_id))
+    return and_(sort_col >= last_value, or_(sort_col > last_value, id_col > last_id))
+
+def paginate_keyset(query, sort_col, id_col, descending=True):
+    """Mengambil satu halaman dari query, diurutkan berdasarkan (sort_col, id_col).
+
+    Mengembalikan (rows, next_cursor); next_cursor bernilai None di halaman terakhir.
+    """
+    limit = get_page_limit()
+    cursor = request.args.get('cursor')
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if isinstance(sort_col.type, db.Date):
+            # Kolom Date dibandingkan dengan date, bukan datetime
+            last_value = last_value.date()
+        query = query.filter(keyset_after(sort_col, id_col, last_value, last_id, descending))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor(getattr(last_row, sort_col.key), getattr(last_row, id_col.key))
+    return rows, next_cursor
+
+@app.errorhandler(HashingBusy)
+def handle_hashing_busy(e):
+    response = jsonify({"msg": "Server sedang sibuk, silakan coba lagi sebentar lagi."})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+# Dua permintaan menulis baris unik yang sama bersamaan, misal log hari ini dari /log dan /sync
+@app.errorhandler(IntegrityError)
+def handle_integrity_error(e):
+    db.session.rollback()
+    return jsonify({"msg": "Data bentrok dengan permintaan lain, silakan coba lagi"}), 409
+
 # --- API ENDPOINTS (RUTE) ---
 @app.route('/')
 def index():
     content = HomePageContent.query.get(1)
     markdown_content = ""
-    # Jika ada konten, proses teksnya dari Markdown ke HTML
+    # HTML sudah dirender saat konten disimpan; render hanya untuk data lama yang belum punya
     if content and content.content:
-        markdown_content = mistune.html(content.content)
+        if content.content_html is None:
+            refresh_rendered_html(content)
+            db.session.commit()
+        markdown_content = content.content_html
 
     return render_template('index.html', content=content, markdown_content=markdown_content)
 
@@ -259,11 +967,18 @@ def login():
     user = RemajaPutri.query.filter_by(username=username).first()
 
     if user and user.check_password(password):
+        # Perbarui hash secara diam-diam jika cost bcrypt di konfigurasi sudah berubah
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
         access_token = create_access_token(identity=str(user.id))
         return jsonify(access_token=access_token)
 
     return jsonify({"msg": "Username atau password salah"}), 401
 
+# Poin untuk setiap log TTD berstatus 'Diminum'
+POINTS_PER_TTD = 10
+
 @app.route('/log', methods=['POST'])
 @jwt_required()
 def add_log():
@@ -294,11 +1009,24 @@ def add_log():
 
     if today_log:
         # --- LOGIKA UPDATE ---
+        dose_cancelled = today_log.status == 'Diminum' and status != 'Diminum'
+        if today_log.status != status:
+            increment_counters(DailyStatusRollup, {'tanggal': today_date, 'status': today_log.status}, log_count=-1)
+            increment_counters(DailyStatusRollup, {'tanggal': today_date, 'status': status}, log_count=1)
+            if status == 'Diminum':
+                update_streak(user, today_date)
+                record_activity(user.id, increments={'log_ttd': 1}, maxima={'streak_max': user.longest_streak})
         today_log.status = status
         today_log.jam_konsumsi = jam_konsumsi
         today_log.efek_samping = efek_samping
         today_log.alasan_lupa = alasan_lupa
         today_log.dosis = dosis 
+        if dose_cancelled:
+            # Jarang terjadi: streak dihitung ulang dari riwayat pengguna ini saja
+            db.session.flush()
+            rebuild_streaks([user.id])
+            # Sama seperti /sync: penghitung mengikuti status akhir, lencana yang sudah didapat tetap
+            record_activity(user.id, increments={'log_ttd': -1})
         message = "Log hari ini berhasil diperbarui."
         status_code = 200
     else:
@@ -313,39 +1041,73 @@ def add_log():
             user_id=user.id
         )
         db.session.add(new_log)
+        increment_counters(DailyStatusRollup, {'tanggal': today_date, 'status': status}, log_count=1)
         
         # Poin hanya diberikan jika statusnya 'Diminum'
         if status == 'Diminum':
-            if user.points is None: user.points = 0
-            user.points += 10
+            award_points(user.id, POINTS_PER_TTD, 'log_ttd')
+            update_streak(user, today_date)
+            record_activity(user.id, increments={'log_ttd': 1}, maxima={'streak_max': user.longest_streak})
         
         message = "Log berhasil ditambahkan!"
         status_code = 201
             
     db.session.commit()
+    if status_code == 201 and status == 'Diminum':
+        refresh_leaderboard_entry(user.id)
     return jsonify({"msg": message}), status_code
 
+def serialize_log(log):
+    return {
+        'id': log.id,
+        'tanggal': log.tanggal.strftime('%Y-%m-%d'),
+        'status': log.status,
+        'dosis': log.dosis,
+        'jam_konsumsi': log.jam_konsumsi.strftime('%H:%M') if log.jam_konsumsi else None,
+        'efek_samping': log.efek_samping,
+        'alasan_lupa': log.alasan_lupa,
+        'catatan_makan': log.catatan_makan or ""
+    }
+
+# Riwayat log TTD, per halaman. Filter opsional ?from=YYYY-MM-DD&to=YYYY-MM-DD.
+# ?stream=1 mengirim seluruh rentang sekaligus sebagai JSON yang di-stream (untuk ekspor).
 @app.route('/logs', methods=['GET'])
 @jwt_required()
 def get_logs():
     current_user_id = get_jwt_identity()
+    query = DailyLog.query.filter_by(user_id=int(current_user_id))
     try:
-        logs = DailyLog.query.filter_by(user_id=current_user_id).order_by(DailyLog.tanggal.desc()).all()
-        output = []
-        for log in logs:
-            if log and log.tanggal:
-                log_data = {
-                    'tanggal': log.tanggal.strftime('%Y-%m-%d'),
-                    'minum_ttd': log.minum_ttd,
-                    'catatan_makan': log.catatan_makan or ""
-                }
-                output.append(log_data)
-        return jsonify({'logs': output})
-    except Exception as e:
-        print(f"!!! KRITIS: Terjadi error di get_logs: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"msg": "Terjadi error internal saat mengambil data log"}), 500
+        if request.args.get('from'):
+            query = query.filter(DailyLog.tanggal >= datetime.strptime(request.args['from'], '%Y-%m-%d').date())
+        if request.args.get('to'):
+            query = query.filter(DailyLog.tanggal <= datetime.strptime(request.args['to'], '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({"msg": "Format tanggal harus YYYY-MM-DD"}), 400
+
+    if request.args.get('stream') == '1':
+        logs = query.order_by(DailyLog.tanggal.desc(), DailyLog.id.desc()).yield_per(STREAM_CHUNK_SIZE)
+
+        def generate():
+            yield '{"logs": ['
+            for index, log in enumerate(logs):
+                yield (',' if index else '') + json.dumps(serialize_log(log))
+            yield ']}'
+
+        return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+    try:
+        logs, next_cursor = paginate_keyset(query, DailyLog.tanggal, DailyLog.id)
+    except ValueError:
+        return jsonify({"msg": "Cursor tidak valid"}), 400
+    return jsonify({'logs': [serialize_log(log) for log in logs], 'next_cursor': next_cursor})
+
+def serialize_nutrition_log(log):
+    return {
+        'id': log.id, 'tanggal': log.tanggal.strftime('%Y-%m-%d'),
+        'karbohidrat': log.karbohidrat, 'lauk_hewani': log.lauk_hewani,
+        'lauk_nabati': log.lauk_nabati, 'sayur': log.sayur, 'buah': log.buah,
+        'camilan_manis': log.camilan_manis, 'minuman_manis': log.minuman_manis
+    }
 
 # Endpoint untuk mendapatkan atau membuat log gizi hari ini
 @app.route('/nutrition-log/today', methods=['GET'])
@@ -362,11 +1124,7 @@ def get_today_nutrition_log():
         db.session.add(log)
         db.session.commit()
         
-    return jsonify({
-        'karbohidrat': log.karbohidrat, 'lauk_hewani': log.lauk_hewani,
-        'lauk_nabati': log.lauk_nabati, 'sayur': log.sayur, 'buah': log.buah,
-        'camilan_manis': log.camilan_manis, 'minuman_manis': log.minuman_manis
-    })
+    return jsonify(serialize_nutrition_log(log))
 
 @app.route('/screening', methods=['POST'])
 @jwt_required()
@@ -394,16 +1152,17 @@ def add_screening():
             age_in_days = (today - user.tanggal_lahir).days
             age_in_months = age_in_days / 30.4375
             
-            # Hitung z-score (asumsi jenis kelamin 'P' untuk perempuan)
-            # Library pyzscore menggunakan indikator: 'bmi_for_age'
-            # Sex: 1 untuk laki-laki, 2 untuk perempuan
-            sex = 2 if user.jenis_kelamin == 'P' else 1
-            bmi_zscore = round(zscore.get_zscore(
+            # Hitung z-score IMT/U dengan referensi WHO 2007 (5-19 tahun)
+            # Jenis kelamin kosong dianggap perempuan karena pengguna aplikasi adalah remaja putri
+            sex = zscore.MALE if user.jenis_kelamin == 'L' else zscore.FEMALE
+            bmi_zscore = zscore.get_zscore(
                 indicator='bmi_for_age', 
                 measurement=imt, 
                 age_in_months=age_in_months, 
                 sex=sex
-            ), 2)
+            )
+            if bmi_zscore is not None:
+                bmi_zscore = round(bmi_zscore, 2)
 
         except Exception as e:
             print(f"Error calculating z-score: {e}")
@@ -421,9 +1180,21 @@ def add_screening():
         riwayat_haid=data.get('riwayat_haid')
     )
     db.session.add(new_screening)
+    record_activity(int(current_user_id), increments={'screening': 1})
     db.session.commit()
     
     return jsonify({"msg": "Data skrining berhasil disimpan!", "imt": imt, "zscore": bmi_zscore}), 201
+def serialize_screening(record):
+    return {
+        'id': record.id,
+        'tanggal_skrining': record.tanggal_skrining.strftime('%d %B %Y'),
+        'berat_badan': record.berat_badan,
+        'tinggi_badan': record.tinggi_badan,
+        'imt': record.imt,
+        'kadar_hb': record.kadar_hb,
+        'riwayat_haid': record.riwayat_haid
+    }
+
 # Endpoint untuk mengambil riwayat skrining pengguna
 @app.route('/screening', methods=['GET'])
 @jwt_required()
@@ -431,14 +1202,7 @@ def get_screening_history():
     current_user_id = get_jwt_identity()
     history = HealthScreening.query.filter_by(user_id=int(current_user_id)).order_by(HealthScreening.tanggal_skrining.desc()).all()
     
-    return jsonify([{
-        'tanggal_skrining': record.tanggal_skrining.strftime('%d %B %Y'),
-        'berat_badan': record.berat_badan,
-        'tinggi_badan': record.tinggi_badan,
-        'imt': record.imt,
-        'kadar_hb': record.kadar_hb,
-        'riwayat_haid': record.riwayat_haid
-    } for record in history])
+    return jsonify([serialize_screening(record) for record in history])
     
 # Endpoint untuk memperbarui log gizi hari ini
 @app.route('/nutrition-log/today', methods=['POST'])
@@ -464,43 +1228,293 @@ def update_today_nutrition_log():
     db.session.commit()
     return jsonify({"msg": "Log gizi berhasil diperbarui"}), 200
 
+# --- SINKRONISASI OFFLINE ---
+MAX_SYNC_ENTRIES = 200
+DAILY_LOG_FIELDS = ('status', 'dosis', 'efek_samping', 'alasan_lupa')
+NUTRITION_BOOL_FIELDS = ('karbohidrat', 'lauk_hewani', 'lauk_nabati', 'sayur', 'buah')
+NUTRITION_COUNT_FIELDS = ('camilan_manis', 'minuman_manis')
+
+# Kolom Text di MySQL menampung 65.535 byte, atau 4 byte per karakter untuk utf8mb4
+TEXT_MAX_CHARS = 65535 // 4
+
+def parse_text_field(entry, field, column, required=False):
+    """Nilai teks opsional dari entri, dicek tipe dan panjangnya terhadap ukuran kolom."""
+    value = entry.get(field)
+    if value is None or (required and value == ''):
+        if required:
+            raise ValueError(f"{field} wajib diisi")
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{field} harus berupa teks")
+    max_length = column.type.length or TEXT_MAX_CHARS
+    if len(value) > max_length:
+        raise ValueError(f"{field} maksimal {max_length} karakter")
+    return value
+
+def parse_sync_entry(entry, kind, today_date):
+    """Memvalidasi satu entri /sync ('daily' atau 'nutrition').
+
+    Mengembalikan (key, tanggal, fields) dengan fields berisi nilai yang siap disimpan,
+    atau melempar ValueError berisi pesan untuk entri itu saja.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("Entri harus berupa objek")
+    key = entry.get('key')
+    if not isinstance(key, str) or not 0 < len(key) <= 64:
+        raise ValueError("key wajib diisi (maksimal 64 karakter)")
+    try:
+        if not isinstance(entry.get('tanggal'), str):
+            raise ValueError
+        tanggal = datetime.strptime(entry['tanggal'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("Format tanggal harus YYYY-MM-DD")
+    if tanggal > today_date:
+        raise ValueError("Tanggal tidak boleh di masa depan")
+
+    fields = {}
+    if kind == 'daily':
+        for field in DAILY_LOG_FIELDS:
+            fields[field] = parse_text_field(entry, field, DailyLog.__table__.c[field], required=field == 'status')
+        jam_konsumsi = entry.get('jam_konsumsi')
+        fields['jam_konsumsi'] = None
+        if jam_konsumsi:
+            try:
+                if not isinstance(jam_konsumsi, str):
+                    raise ValueError
+                fields['jam_konsumsi'] = datetime.strptime(jam_konsumsi, '%H:%M').time()
+            except ValueError:
+                raise ValueError("Format jam_konsumsi harus HH:MM")
+    else:
+        for field in NUTRITION_BOOL_FIELDS:
+            if field in entry:
+                if not isinstance(entry[field], bool):
+                    raise ValueError(f"{field} harus bernilai true/false")
+                fields[field] = entry[field]
+        for field in NUTRITION_COUNT_FIELDS:
+            if field in entry:
+                if isinstance(entry[field], bool) or not isinstance(entry[field], int) or not 0 <= entry[field] <= 2**31 - 1:
+                    raise ValueError(f"{field} harus berupa bilangan bulat positif")
+                fields[field] = entry[field]
+    return key, tanggal, fields
+
+# Menerima sekumpulan log harian & log gizi bertanggal yang dicatat saat offline:
+# {"daily_logs": [{"key", "tanggal", "status", ...}], "nutrition_logs": [{"key", "tanggal", "karbohidrat", ...}]}
+# Semua entri diterapkan dalam satu transaksi; hasil dikembalikan per entri dengan urutan yang sama.
+@app.route('/sync', methods=['POST'])
+@jwt_required()
+def sync_logs():
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    today_date = datetime.utcnow().date()
+    batches = {'daily': data.get('daily_logs') or [], 'nutrition': data.get('nutrition_logs') or []}
+    if not all(isinstance(entries, list) for entries in batches.values()):
+        return jsonify({"msg": "daily_logs dan nutrition_logs harus berupa list"}), 400
+    if sum(len(entries) for entries in batches.values()) > MAX_SYNC_ENTRIES:
+        return jsonify({"msg": f"Maksimal {MAX_SYNC_ENTRIES} entri per sinkronisasi"}), 400
+
+    # Validasi dulu, lalu muat kunci & log yang sudah ada dengan satu query per tabel
+    results = {kind: [None] * len(entries) for kind, entries in batches.items()}
+    valid = {'daily': [], 'nutrition': []}
+    for kind, entries in batches.items():
+        for position, entry in enumerate(entries):
+            try:
+                key, tanggal, fields = parse_sync_entry(entry, kind, today_date)
+            except ValueError as e:
+                key = entry.get('key') if isinstance(entry, dict) and isinstance(entry.get('key'), str) else None
+                results[kind][position] = {'key': key, 'result': 'error', 'msg': str(e)}
+                continue
+            valid[kind].append((position, key, tanggal, fields))
+
+    keys = [key for entries in valid.values() for _, key, _, _ in entries]
+    seen_keys = {key for (key,) in db.session.query(SyncReceipt.idempotency_key).filter(
+        SyncReceipt.user_id == user_id, SyncReceipt.idempotency_key.in_(keys)
+    )} if keys else set()
+
+    daily_dates = {tanggal for _, _, tanggal, _ in valid['daily']}
+    daily_logs = {log.tanggal: log for log in DailyLog.query.filter(
+        DailyLog.user_id == user_id, DailyLog.tanggal.in_(daily_dates)
+    )} if daily_dates else {}
+    nutrition_dates = {tanggal for _, _, tanggal, _ in valid['nutrition']}
+    nutrition_logs = {log.tanggal: log for log in NutritionLog.query.filter(
+        NutritionLog.user_id == user_id, NutritionLog.tanggal.in_(nutrition_dates)
+    )} if nutrition_dates else {}
+
+    initial_status = {tanggal: log.status for tanggal, log in daily_logs.items()}
+    for kind, entries in valid.items():
+        for position, key, tanggal, fields in entries:
+            if key in seen_keys:
+                results[kind][position] = {'key': key, 'result': 'duplicate'}
+                continue
+            seen_keys.add(key)
+
+            if kind == 'daily':
+                log = daily_logs.get(tanggal)
+                if log is None:
+                    log = daily_logs[tanggal] = DailyLog(user_id=user_id, tanggal=tanggal, status=fields['status'])
+                    db.session.add(log)
+                    increment_counters(DailyStatusRollup, {'tanggal': tanggal, 'status': log.status}, log_count=1)
+                    result = 'created'
+                else:
+                    if log.status != fields['status']:
+                        increment_counters(DailyStatusRollup, {'tanggal': tanggal, 'status': log.status}, log_count=-1)
+                        increment_counters(DailyStatusRollup, {'tanggal': tanggal, 'status': fields['status']}, log_count=1)
+                    result = 'updated'
+                for field, value in fields.items():
+                    setattr(log, field, value)
+            else:
+                log = nutrition_logs.get(tanggal)
+                result = 'updated'
+                if log is None:
+                    log = nutrition_logs[tanggal] = NutritionLog(user_id=user_id, tanggal=tanggal)
+                    db.session.add(log)
+                    result = 'created'
+                for field, value in fields.items():
+                    setattr(log, field, value)
+
+            db.session.add(SyncReceipt(user_id=user_id, idempotency_key=key, kind=kind, result=result))
+            results[kind][position] = {'key': key, 'result': result}
+
+    # Poin dan penghitung diambil dari status akhir setiap tanggal, karena satu batch bisa berisi
+    # beberapa entri untuk tanggal yang sama (misal 'Diminum' lalu diubah menjadi 'Lupa')
+    created_diminum = sum(
+        1 for tanggal, log in daily_logs.items() if tanggal not in initial_status and log.status == 'Diminum'
+    )
+    diminum_delta = (
+        sum(log.status == 'Diminum' for log in daily_logs.values())
+        - sum(status == 'Diminum' for status in initial_status.values())
+    )
+    points = created_diminum * POINTS_PER_TTD
+    if points:
+        # Satu penambahan poin untuk seluruh batch
+        award_points(user_id, points, 'sync')
+    if valid['daily']:
+        # Log bisa bertanggal mundur, jadi streak pengguna ini dihitung ulang dari riwayatnya
+        db.session.flush()
+        rebuild_streaks([user_id])
+        longest_streak = db.session.query(RemajaPutri.longest_streak).filter_by(id=user_id).scalar()
+        record_activity(user_id, increments={'log_ttd': diminum_delta}, maxima={'streak_max': longest_streak})
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Batch yang sama sedang diproses oleh permintaan lain
+        db.session.rollback()
+        return jsonify({"msg": "Sinkronisasi bentrok dengan permintaan lain, silakan coba lagi"}), 409
+    if points:
+        refresh_leaderboard_entry(user_id)
+
+    return jsonify({
+        "daily_logs": results['daily'],
+        "nutrition_logs": results['nutrition'],
+        "points_awarded": points
+    })
+
+# Transaksi yang commit sedikit setelah token dibuat bisa membawa updated_at sebelum token,
+# jadi rentang ini ikut dikirim ulang. Klien menimpa data berdasarkan id sehingga duplikat aman.
+CHANGES_OVERLAP = timedelta(seconds=5)
+
+# Mengembalikan hanya data milik pengguna yang dibuat/diubah setelah ?since=<token>,
+# beserta token baru untuk permintaan berikutnya. Tanpa since, semua data dikirim.
+@app.route('/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    user_id = int(get_jwt_identity())
+    now = datetime.utcnow()
+    since = None
+    if request.args.get('since'):
+        try:
+            since = decode_sync_token(request.args['since']) - CHANGES_OVERLAP
+        except ValueError:
+            return jsonify({"msg": "Token tidak valid"}), 400
+
+    def changed(model):
+        query = model.query.filter(model.user_id == user_id)
+        if since:
+            query = query.filter(model.updated_at >= since)
+        return query.order_by(model.updated_at, model.id).all()
+
+    return jsonify({
+        'logs': [serialize_log(log) for log in changed(DailyLog)],
+        'nutrition_logs': [serialize_nutrition_log(log) for log in changed(NutritionLog)],
+        'screenings': [serialize_screening(record) for record in changed(HealthScreening)],
+        'questions': [serialize_question(q) for q in changed(Question)],
+        'token': encode_sync_token(now)
+    })
+
 # Di app.py
 
 # Endpoint untuk mengambil data kuis berdasarkan ID artikel
 @app.route('/quiz/for-article/<int:article_id>', methods=['GET'])
 @jwt_required()
 def get_quiz_for_article(article_id):
-    quiz = Quiz.query.filter_by(article_id=article_id).first()
-    if not quiz:
+    quiz_id = response_cache.get_or_set(
+        f'quiz-for-article:{article_id}', 'quiz_id',
+        lambda: db.session.query(Quiz.id).filter_by(article_id=article_id).scalar()
+    )
+    if quiz_id is None:
         return jsonify({"msg": "Tidak ada kuis untuk artikel ini"}), 404
 
+    quiz_data = response_cache.get_or_set(f'quiz:{quiz_id}', 'payload', lambda: serialize_quiz(load_quiz_tree(quiz_id)))
+    return jsonify(quiz_data)
+
+def load_quiz_tree(quiz_id):
+    """Memuat kuis beserta semua pertanyaan dan pilihannya dalam satu query."""
+    return Quiz.query.options(
+        db.joinedload(Quiz.questions).joinedload(QuizQuestion.choices)
+    ).filter_by(id=quiz_id).first()
+
+def serialize_quiz(quiz):
+    if not quiz:
+        return None
     questions_data = []
     for q in quiz.questions:
         choices_data = [{'id': c.id, 'text': c.choice_text} for c in q.choices]
         questions_data.append({'id': q.id, 'text': q.question_text, 'choices': choices_data})
+    return {'quiz_id': quiz.id, 'questions': questions_data}
+
+def load_answer_key(quiz_id):
+    """Kunci jawaban kuis dalam bentuk {question_id: id pilihan yang benar}.
 
-    return jsonify({'quiz_id': quiz.id, 'questions': questions_data})
+    Sengaja tidak di-cache: skor yang dihitung dari kunci ini disimpan permanen, jadi harus selalu
+    memakai kunci terbaru. Cukup satu query kecil lewat indeks foreign key quiz_id/question_id.
+    Pertanyaan yang belum punya jawaban benar tetap ikut dihitung dengan nilai None.
+    """
+    rows = db.session.query(QuizQuestion.id, QuizChoice.id).outerjoin(
+        QuizChoice, and_(QuizChoice.question_id == QuizQuestion.id, QuizChoice.is_correct.is_(True))
+    ).filter(QuizQuestion.quiz_id == quiz_id).all()
+    return dict(rows)
 
 # Endpoint untuk pengguna mengirimkan jawaban kuis
 @app.route('/quiz/submit/<int:quiz_id>', methods=['POST'])
 @jwt_required()
 def submit_quiz(quiz_id):
     current_user_id = get_jwt_identity()
-    data = request.get_json() # Expected format: {'answers': { 'question_id': 'choice_id', ... }}
+    data = request.get_json(silent=True) or {} # Expected format: {'answers': { 'question_id': 'choice_id', ... }}
     answers = data.get('answers', {})
-    
-    correct_answers = 0
-    total_questions = 0
 
-    for question_id, choice_id in answers.items():
-        total_questions += 1
-        choice = QuizChoice.query.get(int(choice_id))
-        if choice and choice.question_id == int(question_id) and choice.is_correct:
-            correct_answers += 1
+    answer_key = load_answer_key(quiz_id)
+    if not answer_key:
+        return jsonify({"msg": "Kuis tidak ditemukan"}), 404
+    if not isinstance(answers, dict):
+        return jsonify({"msg": "answers harus berupa objek {question_id: choice_id}"}), 400
 
-    score = 0
-    if total_questions > 0:
-        score = int((correct_answers / total_questions) * 100)
+    # Normalisasi ke {question_id: choice_id}; satu soal hanya boleh dijawab sekali ("5" dan "05" dianggap sama)
+    submitted = {}
+    for question_id, choice_id in answers.items():
+        try:
+            question_id, choice_id = int(question_id), int(choice_id)
+        except (TypeError, ValueError):
+            return jsonify({"msg": "question_id dan choice_id harus berupa angka"}), 400
+        if question_id not in answer_key:
+            return jsonify({"msg": f"Soal {question_id} tidak ada di kuis ini"}), 400
+        if question_id in submitted:
+            return jsonify({"msg": f"Soal {question_id} dijawab lebih dari sekali"}), 400
+        submitted[question_id] = choice_id
+
+    # Jumlah soal diambil dari kunci jawaban, bukan dari jumlah jawaban yang dikirim
+    correct_answers = sum(
+        1 for question_id, choice_id in answer_key.items() if choice_id is not None and submitted.get(question_id) == choice_id
+    )
+    score = int((correct_answers / len(answer_key)) * 100)
 
     # Simpan hasil kuis
     new_attempt = UserQuizAttempt(
@@ -509,6 +1523,8 @@ def submit_quiz(quiz_id):
         score=score
     )
     db.session.add(new_attempt)
+    increment_counters(QuizAttemptRollup, {'quiz_id': quiz_id}, attempt_count=1, score_sum=score)
+    record_activity(int(current_user_id), increments={'quiz_attempt': 1, 'quiz_perfect': int(score == 100)})
     db.session.commit()
 
     return jsonify({"msg": "Kuis berhasil diselesaikan!", "score": score})
@@ -516,33 +1532,57 @@ def submit_quiz(quiz_id):
 @app.route('/articles', methods=['GET'])
 @jwt_required()
 def get_articles():
-    articles = Article.query.order_by(Article.created_at.desc()).all()
-    output = []
-    for article in articles:
-        article_data = {
-            'id': article.id,
-            'title': article.title,
-            'snippet': article.content[:100] + '...' if len(article.content) > 100 else article.content,
-            # --- TAMBAHKAN DATA BARU INI ---
-            'image_filename': article.image_filename 
-        }
-        output.append(article_data)
-    return jsonify({'articles': output})
+    def build_page():
+        query = Article.query.options(db.defer(Article.content))
+        articles, next_cursor = paginate_keyset(query, Article.created_at, Article.id)
+
+        output = []
+        for article in articles:
+            article_data = {
+                'id': article.id,
+                'title': article.title,
+                'snippet': article.snippet or '',
+                'word_count': article.word_count,
+                # --- TAMBAHKAN DATA BARU INI ---
+                'image_filename': article.image_filename 
+            }
+            output.append(article_data)
+        return {'articles': output, 'next_cursor': next_cursor}
+
+    page_key = f"{request.args.get('cursor', '')}:{get_page_limit()}"
+    try:
+        return jsonify(response_cache.get_or_set('articles', page_key, build_page))
+    except ValueError:
+        return jsonify({"msg": "Cursor tidak valid"}), 400
 
 # Ganti fungsi get_article_detail yang lama dengan ini:
+# ?format=html mengirim HTML yang sudah dirender sebagai pengganti Markdown mentah
 @app.route('/articles/<int:article_id>', methods=['GET'])
 @jwt_required()
 def get_article_detail(article_id):
-    article = Article.query.get_or_404(article_id)
-    article_data = {
-        'id': article.id,
-        'title': article.title,
-        'content': article.content,
-        'created_at': article.created_at.strftime('%Y-%m-%d') if article.created_at else None,
-        'image_filename': article.image_filename,
-        'video_url': article.video_url
-    }
-    return jsonify(article_data)
+    content_format = request.args.get('format', 'markdown')
+    if content_format not in ('markdown', 'html'):
+        return jsonify({"msg": "Format tidak dikenal"}), 400
+
+    def build_article():
+        article = Article.query.get_or_404(article_id)
+        article_data = {
+            'id': article.id,
+            'title': article.title,
+            'created_at': article.created_at.strftime('%Y-%m-%d') if article.created_at else None,
+            'image_filename': article.image_filename,
+            'video_url': article.video_url
+        }
+        if content_format == 'html':
+            if article.content_html is None:
+                refresh_rendered_html(article)
+                db.session.commit()
+            article_data['content_html'] = article.content_html
+        else:
+            article_data['content'] = article.content
+        return article_data
+
+    return jsonify(response_cache.get_or_set(f'article:{article_id}', content_format, build_article))
 
 @app.route('/profile', methods=['GET'])
 @jwt_required()
@@ -563,6 +1603,103 @@ def get_profile():
     }
     return jsonify(profile_data)
 
+LEADERBOARD_AROUND_ME = 5
+
+# ?scope=global (default) untuk peringkat teratas, ?scope=around_me untuk pengguna di sekitar peringkat sendiri
+@app.route('/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard():
+    user_id = int(get_jwt_identity())
+    scope = request.args.get('scope', 'global')
+    if scope not in ('global', 'around_me'):
+        return jsonify({"msg": "scope harus 'global' atau 'around_me'"}), 400
+
+    me = db.session.query(RemajaPutri.id, RemajaPutri.username, RemajaPutri.points).filter_by(id=user_id).first()
+    if me is None:
+        return jsonify({"msg": "Pengguna tidak ditemukan"}), 404
+    my_rank = leaderboard_rank(me)
+
+    if scope == 'global':
+        limit = max(1, min(request.args.get('limit', 10, type=int), LEADERBOARD_CACHE_SIZE))
+        entries = [leaderboard_entry(entry, rank) for rank, entry in enumerate(load_leaderboard_top()[:limit], start=1)]
+    else:
+        columns = (RemajaPutri.id, RemajaPutri.username, RemajaPutri.points)
+        above = db.session.query(*columns).filter(
+            keyset_after(RemajaPutri.points, RemajaPutri.id, me.points, me.id)
+        ).order_by(RemajaPutri.points.asc(), RemajaPutri.id.asc()).limit(LEADERBOARD_AROUND_ME).all()
+        below = db.session.query(*columns).filter(
+            keyset_after(RemajaPutri.points, RemajaPutri.id, me.points, me.id, descending=True)
+        ).order_by(RemajaPutri.points.desc(), RemajaPutri.id.desc()).limit(LEADERBOARD_AROUND_ME).all()
+
+        entries = [leaderboard_entry(row._asdict(), my_rank - offset) for offset, row in reversed(list(enumerate(above, start=1)))]
+        entries.append(leaderboard_entry(me._asdict(), my_rank))
+        entries += [leaderboard_entry(row._asdict(), my_rank + offset) for offset, row in enumerate(below, start=1)]
+
+    return jsonify({'scope': scope, 'leaderboard': entries, 'me': {'rank': my_rank, 'points': me.points}})
+
+# Semua lencana beserta status perolehannya untuk pengguna ini
+@app.route('/badges', methods=['GET'])
+@jwt_required()
+def get_badges():
+    user_id = int(get_jwt_identity())
+    rows = db.session.query(Badge, UserBadge.earned_at).outerjoin(
+        UserBadge, and_(UserBadge.badge_id == Badge.id, UserBadge.user_id == user_id)
+    ).order_by(Badge.id).all()
+    return jsonify({'badges': [{
+        'id': badge.id,
+        'name': badge.name,
+        'description': badge.description,
+        'icon_name': badge.icon_name,
+        'earned_at': earned_at.strftime('%d %B %Y') if earned_at else None
+    } for badge, earned_at in rows]})
+
+SUMMARY_ARTICLE_COUNT = 3
+# Semua data layar beranda dalam satu permintaan: profil, log hari ini, pertanyaan, streak, artikel terbaru
+@app.route('/me/summary', methods=['GET'])
+@jwt_required()
+def get_summary():
+    user_id = int(get_jwt_identity())
+    today_date = datetime.utcnow().date()
+
+    # Profil, log hari ini dan jumlah pertanyaan yang belum dijawab diambil dalam satu query
+    unanswered_count = select(func.count(Question.id)).where(
+        Question.user_id == RemajaPutri.id, Question.status == 'Belum Dijawab'
+    ).scalar_subquery()
+    row = db.session.query(RemajaPutri, DailyLog, NutritionLog, unanswered_count).outerjoin(
+        DailyLog, and_(DailyLog.user_id == RemajaPutri.id, DailyLog.tanggal == today_date)
+    ).outerjoin(
+        NutritionLog, and_(NutritionLog.user_id == RemajaPutri.id, NutritionLog.tanggal == today_date)
+    ).filter(RemajaPutri.id == user_id).first()
+    if row is None:
+        return jsonify({"msg": "Pengguna tidak ditemukan"}), 404
+    user, today_log, today_nutrition, unanswered = row
+
+    def build_latest_articles():
+        articles = Article.query.options(db.defer(Article.content)).order_by(
+            Article.created_at.desc(), Article.id.desc()
+        ).limit(SUMMARY_ARTICLE_COUNT).all()
+        return [{
+            'id': article.id,
+            'title': article.title,
+            'snippet': article.snippet or '',
+            'image_filename': article.image_filename
+        } for article in articles]
+
+    return jsonify({
+        'profile': {
+            'username': user.username,
+            'points': user.points or 0,
+            'join_date': user.created_at.strftime('%d %B %Y'),
+            'profile_image_filename': user.profile_image_filename,
+            'level_title': get_user_level(user.points or 0)
+        },
+        'today_log': serialize_log(today_log) if today_log else None,
+        'today_nutrition_log': serialize_nutrition_log(today_nutrition) if today_nutrition else None,
+        'unanswered_questions': unanswered,
+        'streak': streak_as_of(user, today_date),
+        'latest_articles': response_cache.get_or_set('articles', f'latest:{SUMMARY_ARTICLE_COUNT}', build_latest_articles)
+    })
+
 @app.route('/questions', methods=['POST'])
 @jwt_required()
 def ask_question():
@@ -583,6 +1720,15 @@ def ask_question():
     return jsonify({"msg": "Pertanyaan Anda telah berhasil dikirim!"}), 201
 
 
+def serialize_question(q):
+    return {
+        'id': q.id,
+        'question_text': q.question_text,
+        'answer_text': q.answer_text or "Belum ada jawaban.",
+        'status': q.status,
+        'created_at': q.created_at.strftime('%d %B %Y')
+    }
+
 # Endpoint untuk pengguna melihat riwayat pertanyaan mereka
 @app.route('/questions', methods=['GET'])
 @jwt_required()
@@ -590,19 +1736,7 @@ def get_my_questions():
     current_user_id = get_jwt_identity()
     
     questions = Question.query.filter_by(user_id=int(current_user_id)).order_by(Question.created_at.desc()).all()
-    
-    output = []
-    for q in questions:
-        question_data = {
-            'id': q.id,
-            'question_text': q.question_text,
-            'answer_text': q.answer_text or "Belum ada jawaban.",
-            'status': q.status,
-            'created_at': q.created_at.strftime('%d %B %Y')
-        }
-        output.append(question_data)
-        
-    return jsonify({'questions': output})
+    return jsonify({'questions': [serialize_question(q) for q in questions]})
 
 # --- FORUM API ENDPOINTS ---
 
@@ -613,37 +1747,65 @@ def get_forum_topics():
     topics = ForumTopic.query.all()
     return jsonify([{'id': topic.id, 'name': topic.name, 'description': topic.description} for topic in topics])
 
-# Mendapatkan semua postingan dalam satu topik
+# Mendapatkan postingan dalam satu topik, per halaman (?cursor=<next_cursor>)
 @app.route('/forum/posts/in-topic/<int:topic_id>', methods=['GET'])
 @jwt_required()
 def get_posts_in_topic(topic_id):
-    posts = ForumPost.query.filter_by(topic_id=topic_id).order_by(ForumPost.created_at.desc()).all()
-    return jsonify([{
-        'id': post.id,
-        'title': post.title,
-        'author': post.user.username,
-        'reply_count': post.replies.count()
-    } for post in posts])
+    query = db.session.query(
+        ForumPost.id, ForumPost.title, ForumPost.created_at,
+        ForumPost.reply_count, ForumPost.last_reply_at, RemajaPutri.username
+    ).join(RemajaPutri, RemajaPutri.id == ForumPost.user_id).filter(ForumPost.topic_id == topic_id)
 
-# Mendapatkan detail satu postingan beserta semua balasannya
+    try:
+        posts, next_cursor = paginate_keyset(query, ForumPost.created_at, ForumPost.id)
+    except ValueError:
+        return jsonify({"msg": "Cursor tidak valid"}), 400
+
+    return jsonify({
+        'posts': [{
+            'id': post.id,
+            'title': post.title,
+            'author': post.username,
+            'reply_count': post.reply_count,
+            'last_reply_at': post.last_reply_at.strftime('%d %B %Y, %H:%M') if post.last_reply_at else None
+        } for post in posts],
+        'next_cursor': next_cursor
+    })
+
+# Mendapatkan detail satu postingan beserta balasannya, per halaman.
+# ?cursor=<cursor> untuk halaman berikutnya, ?after=<reply_id> untuk mengambil balasan baru saja.
 @app.route('/forum/post/<int:post_id>', methods=['GET'])
 @jwt_required()
 def get_post_details(post_id):
-    post = ForumPost.query.get_or_404(post_id)
-    replies = post.replies.order_by(ForumReply.created_at.asc()).all()
-    
+    post = ForumPost.query.options(db.joinedload(ForumPost.user)).filter_by(id=post_id).first_or_404()
+    replies_query = ForumReply.query.options(db.joinedload(ForumReply.user)).filter_by(post_id=post.id)
+
+    after = request.args.get('after', type=int)
+    next_cursor = None
+    if after is not None:
+        # ID balasan naik seiring waktu, jadi cukup ambil yang ID-nya lebih besar
+        replies = replies_query.filter(ForumReply.id > after).order_by(ForumReply.id.asc()).limit(get_page_limit()).all()
+    else:
+        try:
+            replies, next_cursor = paginate_keyset(replies_query, ForumReply.created_at, ForumReply.id, descending=False)
+        except ValueError:
+            return jsonify({"msg": "Cursor tidak valid"}), 400
+
     post_data = {
         'id': post.id,
         'title': post.title,
         'content': post.content,
         'author': post.user.username,
         'created_at': post.created_at.strftime('%d %B %Y'),
+        'reply_count': post.reply_count,
         'replies': [{
             'id': reply.id,
             'content': reply.content,
             'author': reply.user.username,
             'created_at': reply.created_at.strftime('%d %B %Y, %H:%M')
-        } for reply in replies]
+        } for reply in replies],
+        'next_cursor': next_cursor,
+        'last_reply_id': replies[-1].id if replies else after
     }
     return jsonify(post_data)
 
@@ -660,6 +1822,7 @@ def create_post():
         user_id=int(current_user_id)
     )
     db.session.add(new_post)
+    record_activity(int(current_user_id), increments={'forum_post': 1})
     db.session.commit()
     return jsonify({'msg': 'Postingan berhasil dibuat!', 'post_id': new_post.id}), 201
 
@@ -669,12 +1832,24 @@ def create_post():
 def create_reply(post_id):
     current_user_id = get_jwt_identity()
     data = request.get_json()
+    now = datetime.utcnow()
+
+    # Penambahan dilakukan di SQL agar balasan yang masuk bersamaan tidak saling menimpa
+    updated = ForumPost.query.filter_by(id=post_id).update({
+        ForumPost.reply_count: ForumPost.reply_count + 1,
+        ForumPost.last_reply_at: now
+    }, synchronize_session=False)
+    if not updated:
+        return jsonify({"msg": "Postingan tidak ditemukan"}), 404
+
     new_reply = ForumReply(
         content=data['content'],
         post_id=post_id,
-        user_id=int(current_user_id)
+        user_id=int(current_user_id),
+        created_at=now
     )
     db.session.add(new_reply)
+    record_activity(int(current_user_id), increments={'forum_reply': 1})
     db.session.commit()
     return jsonify({'msg': 'Balasan berhasil dikirim!'}), 201
 
@@ -697,6 +1872,9 @@ def admin_login():
         password = request.form.get('password')
         admin = Admin.query.filter_by(username=username).first()
         if admin and admin.check_password(password):
+            if password_hasher.needs_rehash(admin.password_hash):
+                admin.password_hash = password_hasher.hash(password)
+                db.session.commit()
             session['admin_id'] = admin.id
             session['admin_username'] = admin.username
             session['admin_role'] = admin.role # <-- SIMPAN ROLE DI SESSION
@@ -751,8 +1929,11 @@ def add_new_article():
         video_url=video_url, 
         image_filename=image_filename
     )
+    new_article.refresh_summary()
+    refresh_rendered_html(new_article)
     db.session.add(new_article)
     db.session.commit()
+    response_cache.invalidate('articles')
     return redirect(url_for('manage_articles'))
 
 # Endpoint untuk memproses data dari form edit artikel
@@ -763,6 +1944,8 @@ def update_article(article_id):
     article.title = request.form.get('title')
     article.content = request.form.get('content')
     article.video_url = request.form.get('video_url')
+    article.refresh_summary()
+    refresh_rendered_html(article)
 
     image_file = request.files.get('image_file')
     if image_file and image_file.filename != '':
@@ -771,6 +1954,7 @@ def update_article(article_id):
         article.image_filename = image_filename # Update nama file jika ada gambar baru
 
     db.session.commit()
+    response_cache.invalidate('articles', f'article:{article_id}')
     return redirect(url_for('manage_articles'))
 
 # Halaman untuk mengedit artikel (menampilkan form dengan data lama)
@@ -785,8 +1969,14 @@ def edit_article_form(article_id):
 @admin_login_required
 def delete_article(article_id):
     article = Article.query.get_or_404(article_id)
+    # Id kuis dicari sebelum dihapus agar payload kuisnya ikut diinvalidasi
+    quiz_id = db.session.query(Quiz.id).filter_by(article_id=article_id).scalar()
     db.session.delete(article)
     db.session.commit()
+    namespaces = ['articles', f'article:{article_id}', f'quiz-for-article:{article_id}']
+    if quiz_id is not None:
+        namespaces.append(f'quiz:{quiz_id}')
+    response_cache.invalidate(*namespaces)
     return redirect(url_for('manage_articles'))
 
 @app.route('/admin/dashboard')
@@ -850,6 +2040,7 @@ def edit_homepage():
     if request.method == 'POST':
         content.title = request.form.get('title')
         content.content = request.form.get('content')
+        refresh_rendered_html(content)
 
         image_file = request.files.get('image_file')
         if image_file and image_file.filename != '':
@@ -871,33 +2062,172 @@ def manage_app_users():
         flash("Anda tidak memiliki izin untuk mengakses halaman ini.")
         return redirect(url_for('admin_dashboard'))
 
-    all_users = RemajaPutri.query.order_by(RemajaPutri.created_at.desc()).all()
-    
-    # Logika untuk mencari pengguna yang belum log hari ini
+    sort_columns = {
+        'created_at': RemajaPutri.created_at,
+        'username': RemajaPutri.username,
+        'points': RemajaPutri.points
+    }
+    sort = request.args.get('sort', 'created_at')
+    if sort not in sort_columns:
+        sort = 'created_at'
+    order = 'asc' if request.args.get('order') == 'asc' else 'desc'
+    sort_column = sort_columns[sort].asc() if order == 'asc' else sort_columns[sort].desc()
+    per_page = 50
+
+    all_users = RemajaPutri.query.order_by(sort_column, RemajaPutri.id).paginate(
+        page=request.args.get('page', 1, type=int), per_page=per_page, error_out=False
+    )
+
+    # Pengguna yang belum log hari ini dicari langsung di SQL dengan NOT EXISTS
     today_date = datetime.utcnow().date()
-    users_who_logged_today_ids = [
-        log.user_id for log in DailyLog.query.filter_by(tanggal=today_date).all()
-    ]
-    
-    users_not_logged_today = RemajaPutri.query.filter(
-        RemajaPutri.id.notin_(users_who_logged_today_ids)
-    ).all()
+    logged_today = db.session.query(DailyLog.id).filter(
+        DailyLog.user_id == RemajaPutri.id, DailyLog.tanggal == today_date
+    ).exists()
+    users_not_logged_today = RemajaPutri.query.filter(~logged_today).order_by(sort_column, RemajaPutri.id).paginate(
+        page=request.args.get('missing_page', 1, type=int), per_page=per_page, error_out=False
+    )
 
     return render_template(
         'manage_app_users.html', 
         all_users=all_users, 
-        users_not_logged_today=users_not_logged_today
+        users_not_logged_today=users_not_logged_today,
+        roster_max_rows=ROSTER_UPLOAD_MAX_ROWS,
+        sort=sort,
+        order=order
     )
 
+# Batas baris untuk impor lewat halaman admin; roster yang lebih besar diimpor dengan `flask import-roster`
+ROSTER_UPLOAD_MAX_ROWS = 200
+
+def import_roster(csv_file, hash_passwords, max_rows=None):
+    """Membuat akun RemajaPutri secara massal dari roster CSV.
+
+    Kolom wajib: username, password. Kolom opsional: tanggal_lahir (YYYY-MM-DD),
+    jenis_kelamin (L/P), jadwal_ttd (misal "0,3"). Username yang sudah terdaftar dilewati.
+    Baris yang tidak valid dilaporkan di errors dan tidak ikut dibuat.
+    hash_passwords(list password) -> list hash; process pool hanya dipakai dari CLI.
+    """
+    started = time.perf_counter()
+    rows, errors, seen = [], [], set()
+    for line_no, record in enumerate(csv.DictReader(csv_file), start=2):
+        username = (record.get('username') or '').strip()
+        password = record.get('password') or ''
+        if not username or not password:
+            errors.append(f"Baris {line_no}: username dan password dibutuhkan")
+            continue
+        if username in seen:
+            errors.append(f"Baris {line_no}: username '{username}' muncul lebih dari sekali")
+            continue
+
+        tanggal_lahir = None
+        if record.get('tanggal_lahir'):
+            try:
+                tanggal_lahir = datetime.strptime(record['tanggal_lahir'].strip(), '%Y-%m-%d').date()
+            except ValueError:
+                errors.append(f"Baris {line_no}: format tanggal_lahir harus YYYY-MM-DD")
+                continue
+
+        jenis_kelamin = (record.get('jenis_kelamin') or '').strip().upper() or None
+        if jenis_kelamin not in (None, 'L', 'P'):
+            errors.append(f"Baris {line_no}: jenis_kelamin harus L atau P")
+            continue
+
+        jadwal_ttd = (record.get('jadwal_ttd') or '0').strip()
+        if not is_valid_jadwal(jadwal_ttd):
+            errors.append(f"Baris {line_no}: jadwal_ttd harus berisi nomor hari 0-6 dipisah koma, misal 0,3")
+            continue
+
+        seen.add(username)
+        rows.append({
+            'username': username,
+            'password': password,
+            'tanggal_lahir': tanggal_lahir,
+            'jenis_kelamin': jenis_kelamin,
+            'jadwal_ttd': jadwal_ttd,
+            'jadwal_ttd_mask': jadwal_to_mask(jadwal_ttd)
+        })
+
+    # Cek bentrok username dengan satu query
+    existing = {
+        username for (username,) in db.session.query(RemajaPutri.username).filter(RemajaPutri.username.in_(seen))
+    } if seen else set()
+    rows = [row for row in rows if row['username'] not in existing]
+    if max_rows is not None and len(rows) > max_rows:
+        errors.append(f"Roster berisi {len(rows)} akun baru, maksimal {max_rows} per unggahan; "
+                      f"gunakan perintah `flask import-roster` untuk roster besar.")
+        rows = []
+
+    hashes = hash_passwords([row.pop('password') for row in rows]) if rows else []
+    for row, password_hash in zip(rows, hashes):
+        row['password_hash'] = password_hash
+
+    if rows:
+        try:
+            db.session.execute(insert(RemajaPutri), rows)
+            db.session.commit()
+        except IntegrityError:
+            # Impor lain mendaftarkan username yang sama setelah pengecekan di atas
+            db.session.rollback()
+            errors.append("Sebagian username baru saja didaftarkan oleh proses lain; tidak ada akun yang dibuat, "
+                          "silakan ulangi impor.")
+            rows = []
+
+    elapsed = time.perf_counter() - started
+    return {
+        'created': len(rows),
+        'existing': sorted(existing),
+        'errors': errors,
+        'seconds': elapsed,
+        'per_second': len(rows) / elapsed if elapsed else 0
+    }
+
+@app.route('/admin/app-users/import', methods=['POST'])
+@admin_login_required
+def import_app_users():
+    if session.get('admin_role') != 'superadmin':
+        flash("Anda tidak memiliki izin untuk melakukan aksi ini.")
+        return redirect(url_for('manage_app_users'))
+
+    roster_file = request.files.get('roster_file')
+    if not roster_file or roster_file.filename == '':
+        flash("Pilih file roster CSV terlebih dahulu.")
+        return redirect(url_for('manage_app_users'))
+
+    # Di dalam request dipakai pool hashing terbatas (hashing.py), bukan process pool
+    try:
+        result = import_roster(
+            io.TextIOWrapper(roster_file.stream, encoding='utf-8-sig'),
+            lambda passwords: [password_hasher.hash(password) for password in passwords],
+            max_rows=ROSTER_UPLOAD_MAX_ROWS
+        )
+    except HashingBusy:
+        flash("Server sedang sibuk, tidak ada akun yang dibuat. Silakan coba lagi sebentar lagi.")
+        return redirect(url_for('manage_app_users'))
+    for error in result['errors'][:10]:
+        flash(error)
+    flash(f"{result['created']} akun dibuat dalam {result['seconds']:.1f} detik "
+          f"({result['per_second']:.0f} akun/detik). {len(result['existing'])} username sudah terdaftar, "
+          f"{len(result['errors'])} kesalahan.")
+    return redirect(url_for('manage_app_users'))
+
 # Endpoint untuk memproses reset password pengguna
+# Tanpa user_id, pengguna dicari dari username di form (tidak terbatas pada halaman daftar yang sedang tampil)
+@app.route('/admin/app-users/reset-password', methods=['POST'])
 @app.route('/admin/app-users/reset-password/<int:user_id>', methods=['POST'])
 @admin_login_required
-def reset_user_password(user_id):
+def reset_user_password(user_id=None):
     if session.get('admin_role') != 'superadmin':
         flash("Anda tidak memiliki izin untuk melakukan aksi ini.")
         return redirect(url_for('manage_app_users'))
 
-    user = RemajaPutri.query.get_or_404(user_id)
+    if user_id is None:
+        username = (request.form.get('username') or '').strip()
+        user = RemajaPutri.query.filter_by(username=username).first()
+        if not user:
+            flash(f"Pengguna '{username}' tidak ditemukan.")
+            return redirect(url_for('manage_app_users'))
+    else:
+        user = RemajaPutri.query.get_or_404(user_id)
     new_password = request.form.get('new_password')
 
     if not new_password or len(new_password) < 6:
@@ -905,7 +2235,7 @@ def reset_user_password(user_id):
         return redirect(url_for('manage_app_users'))
 
     # Hash password baru dan simpan
-    user.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+    user.password_hash = password_hasher.hash(new_password)
     db.session.commit()
 
     flash(f"Password untuk pengguna '{user.username}' telah berhasil direset.")
@@ -927,7 +2257,7 @@ def reset_admin_password(admin_id):
         return redirect(url_for('manage_users'))
 
     # Hash password baru dan perbarui di database
-    admin_to_reset.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+    admin_to_reset.password_hash = password_hasher.hash(new_password)
     db.session.commit()
 
     flash(f"Password untuk '{admin_to_reset.username}' telah berhasil direset.")
@@ -946,6 +2276,8 @@ def manage_quiz(article_id):
         quiz = Quiz(article_id=article.id)
         db.session.add(quiz)
         db.session.commit()
+    else:
+        quiz = load_quiz_tree(quiz.id)
     return render_template('manage_quiz.html', article=article, quiz=quiz)
 
 # Endpoint untuk menambah pertanyaan baru ke kuis
@@ -962,6 +2294,7 @@ def add_quiz_question(quiz_id):
             db.session.add(QuizChoice(question_id=new_question.id, choice_text=""))
         db.session.commit()
     quiz = Quiz.query.get_or_404(quiz_id)
+    response_cache.invalidate(f'quiz:{quiz_id}')
     return redirect(url_for('manage_quiz', article_id=quiz.article_id))
 
 # Endpoint untuk menyimpan/mengupdate pilihan jawaban
@@ -976,6 +2309,7 @@ def update_quiz_choices(question_id):
         choice.is_correct = (str(choice.id) == correct_choice_id)
     
     db.session.commit()
+    response_cache.invalidate(f'quiz:{question.quiz_id}')
     return redirect(url_for('manage_quiz', article_id=question.quiz.article_id))
 
 @app.route('/admin/reports')
@@ -984,22 +2318,47 @@ def reports():
     # Laporan 1: Total Pengguna
     total_users = RemajaPutri.query.count()
 
-    # Laporan 2: Kepatuhan TTD (30 hari terakhir)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    # Laporan 2: Kepatuhan TTD (30 hari terakhir), dibaca dari tabel rekap harian
+    thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date()
     ttd_compliance = db.session.query(
-        DailyLog.status, func.count(DailyLog.id)
-    ).filter(DailyLog.tanggal >= thirty_days_ago).group_by(DailyLog.status).all()
+        DailyStatusRollup.status, func.sum(DailyStatusRollup.log_count)
+    ).filter(DailyStatusRollup.tanggal >= thirty_days_ago).group_by(DailyStatusRollup.status).all()
     
-    # Laporan 3: Rata-rata Skor Kuis
+    # Laporan 3: Rata-rata Skor Kuis, dari tabel rekap per kuis
     quiz_performance = db.session.query(
-        Article.title, func.avg(UserQuizAttempt.score).label('avg_score')
-    ).join(Quiz, Quiz.article_id == Article.id).join(UserQuizAttempt, UserQuizAttempt.quiz_id == Quiz.id).group_by(Article.title).all()
+        Article.title, (QuizAttemptRollup.score_sum * 1.0 / QuizAttemptRollup.attempt_count).label('avg_score')
+    ).join(Quiz, Quiz.article_id == Article.id).join(QuizAttemptRollup, QuizAttemptRollup.quiz_id == Quiz.id).filter(
+        QuizAttemptRollup.attempt_count > 0
+    ).all()
 
     return render_template(
         'reports.html', 
         total_users=total_users, 
-        ttd_compliance=dict(ttd_compliance),
-        quiz_performance=quiz_performance
+        ttd_compliance={status: int(total) for status, total in ttd_compliance},
+        quiz_performance=quiz_performance,
+        adherence=adherence_report()
+    )
+
+
+@app.route('/admin/risk')
+@admin_login_required
+def risk_scores():
+    category = request.args.get('category')
+    if category not in (risk.HIGH, risk.MEDIUM, risk.LOW):
+        category = None
+
+    query = RiskScore.query.options(db.joinedload(RiskScore.user))
+    if category:
+        query = query.filter(RiskScore.category == category)
+    scores = query.order_by(RiskScore.score.desc(), RiskScore.user_id.desc()).paginate(
+        page=request.args.get('page', 1, type=int), per_page=50, error_out=False
+    )
+    return render_template(
+        'risk_scores.html',
+        scores=scores,
+        category=category,
+        categories=[risk.HIGH, risk.MEDIUM, risk.LOW],
+        computed_at=db.session.query(func.max(RiskScore.computed_at)).scalar()
     )
 
 
@@ -1047,6 +2406,259 @@ def upload_profile_picture():
         return jsonify({"msg": "Foto profil berhasil diperbarui!", "filename": filename}), 200
     
     return jsonify({"msg": "Gagal mengunggah file"}), 500
+# --- PERINTAH CLI ---
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups():
+    """Menghitung ulang semua tabel rekap laporan dari data mentah."""
+    DailyStatusRollup.query.delete()
+    db.session.execute(insert(DailyStatusRollup).from_select(
+        ['tanggal', 'status', 'log_count'],
+        select(DailyLog.tanggal, DailyLog.status, func.count(DailyLog.id)).group_by(DailyLog.tanggal, DailyLog.status)
+    ))
+
+    QuizAttemptRollup.query.delete()
+    db.session.execute(insert(QuizAttemptRollup).from_select(
+        ['quiz_id', 'attempt_count', 'score_sum'],
+        select(UserQuizAttempt.quiz_id, func.count(UserQuizAttempt.id), func.sum(UserQuizAttempt.score)).group_by(UserQuizAttempt.quiz_id)
+    ))
+
+    db.session.commit()
+    click.echo(f"Rekap dibangun ulang: {DailyStatusRollup.query.count()} baris harian, "
+               f"{QuizAttemptRollup.query.count()} baris kuis.")
+
+@app.cli.command('bench-login')
+@click.option('--seconds', default=5.0, help='Lama benchmark dalam detik.')
+@click.option('--concurrency', default=None, type=int, help='Jumlah klien paralel (default: 2x worker).')
+def bench_login(seconds, concurrency):
+    """Mengukur verifikasi password (bagian termahal dari login) per detik per core."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    concurrency = concurrency or app.config['PASSWORD_HASH_WORKERS'] * 2
+    password_hash = password_hasher.hash('benchmark-password')
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            try:
+                password_hasher.verify(password_hash, 'benchmark-password')
+                outcome = 'ok'
+            except HashingBusy:
+                outcome = 'busy'
+                time.sleep(0.001)
+            with lock:
+                counts[outcome] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    per_second = counts['ok'] / elapsed
+    click.echo(f"cost={password_hasher.rounds} worker={app.config['PASSWORD_HASH_WORKERS']} "
+               f"klien={concurrency} core={cores}")
+    click.echo(f"{per_second:.1f} login/detik, {per_second / cores:.1f} login/detik/core, "
+               f"{counts['busy']} ditolak (503)")
+
+@app.cli.command('import-roster')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--processes', default=None, type=int, help='Jumlah proses hashing (default: jumlah CPU).')
+def import_roster_command(csv_path, processes):
+    """Membuat akun pengguna secara massal dari roster kelas dalam format CSV."""
+    with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+        result = import_roster(
+            csv_file,
+            lambda passwords: hash_passwords_parallel(passwords, app.config['BCRYPT_LOG_ROUNDS'], processes)
+        )
+
+    for error in result['errors']:
+        click.echo(error)
+    if result['existing']:
+        click.echo(f"Dilewati (sudah terdaftar): {', '.join(result['existing'])}")
+    click.echo(f"{result['created']} akun dibuat dalam {result['seconds']:.2f} detik "
+               f"({result['per_second']:.1f} akun/detik).")
+
+@app.cli.command('check-zscore')
+@click.option('--tolerance', default=0.1, help='Selisih z-score maksimum terhadap tabel WHO.')
+def check_zscore(tolerance):
+    """Mencocokkan mesin z-score IMT/U dengan titik acuan tabel WHO 2007."""
+    mismatches = zscore.verify_reference(tolerance)
+    for indicator, sex, age, value, expected, actual in mismatches:
+        click.echo(f"{indicator} sex={sex} umur={age} bln IMT={value}: diharapkan z={expected:+.0f}, didapat {actual:+.3f}")
+    checked = sum(len(points) for *_, points in zscore.PUBLISHED_REFERENCE)
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} dari {checked} titik acuan tidak cocok.")
+    click.echo(f"Semua {checked} titik acuan WHO cocok (toleransi {tolerance}).")
+
+def compute_screening_metrics(rows):
+    """Menghitung IMT dan z-score IMT/U untuk satu chunk skrining sekaligus (array NumPy).
+
+    Umur dihitung pada tanggal skrining, bukan hari ini. Nilai yang tidak bisa dihitung menjadi None.
+    """
+    def as_array(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    berat = as_array([row.berat_badan for row in rows])
+    tinggi_m = as_array([row.tinggi_badan for row in rows]) / 100
+    age_in_months = as_array([
+        (row.tanggal_skrining - row.tanggal_lahir).days / 30.4375 if row.tanggal_lahir else None
+        for row in rows
+    ])
+    sex = np.array([zscore.MALE if row.jenis_kelamin == 'L' else zscore.FEMALE for row in rows])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        imt = np.round(berat / (tinggi_m * tinggi_m), 2)
+    imt[~np.isfinite(imt)] = np.nan
+    bmi_zscore = np.round(zscore.zscores('bmi_for_age', imt, age_in_months, sex), 2)
+
+    def as_list(values):
+        return [None if np.isnan(value) else float(value) for value in values]
+
+    return as_list(imt), as_list(bmi_zscore)
+
+@app.cli.command('backfill-screening-zscores')
+@click.option('--chunk-size', default=500, help='Jumlah skrining per chunk.')
+@click.option('--sleep', 'sleep_seconds', default=0.5, help='Jeda (detik) antar chunk agar tidak membebani database.')
+@click.option('--restart', is_flag=True, help='Mulai lagi dari awal, abaikan checkpoint.')
+def backfill_screening_zscores(chunk_size, sleep_seconds, restart):
+    """Menghitung ulang imt dan bmi_zscore seluruh riwayat skrining, per chunk dan bisa dilanjutkan."""
+    checkpoint = db.session.get(BackfillCheckpoint, 'screening-zscores')
+    if checkpoint is None or restart:
+        checkpoint = db.session.merge(BackfillCheckpoint(name='screening-zscores', last_id=0, processed_count=0))
+    if checkpoint.last_id:
+        click.echo(f"Melanjutkan dari id {checkpoint.last_id} ({checkpoint.processed_count} sudah diproses).")
+
+    while True:
+        rows = db.session.query(
+            HealthScreening.id, HealthScreening.berat_badan, HealthScreening.tinggi_badan,
+            HealthScreening.tanggal_skrining, RemajaPutri.tanggal_lahir, RemajaPutri.jenis_kelamin
+        ).join(RemajaPutri, HealthScreening.user_id == RemajaPutri.id).filter(
+            HealthScreening.id > checkpoint.last_id
+        ).order_by(HealthScreening.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        imt, bmi_zscore = compute_screening_metrics(rows)
+        # Bulk UPDATE berdasarkan primary key, satu statement per chunk
+        db.session.execute(update(HealthScreening), [
+            {'id': row.id, 'imt': row_imt, 'bmi_zscore': row_zscore}
+            for row, row_imt, row_zscore in zip(rows, imt, bmi_zscore)
+        ])
+        checkpoint.last_id = rows[-1].id
+        checkpoint.processed_count += len(rows)
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.commit()
+        click.echo(f"Diproses sampai id {checkpoint.last_id} ({checkpoint.processed_count} skrining).")
+
+        if len(rows) < chunk_size:
+            break
+        time.sleep(sleep_seconds)
+
+    click.echo(f"Backfill selesai: {checkpoint.processed_count} skrining diperbarui.")
+
+def rebuild_user_counters():
+    """Menghitung ulang semua penghitung lencana dari data mentah, termasuk streak pengguna."""
+    rebuild_streaks()
+    sources = {
+        'log_ttd': select(DailyLog.user_id, func.count(DailyLog.id)).where(DailyLog.status == 'Diminum').group_by(DailyLog.user_id),
+        'quiz_attempt': select(UserQuizAttempt.user_id, func.count(UserQuizAttempt.id)).group_by(UserQuizAttempt.user_id),
+        'quiz_perfect': select(UserQuizAttempt.user_id, func.count(UserQuizAttempt.id)).where(UserQuizAttempt.score == 100).group_by(UserQuizAttempt.user_id),
+        'screening': select(HealthScreening.user_id, func.count(HealthScreening.id)).group_by(HealthScreening.user_id),
+        'forum_post': select(ForumPost.user_id, func.count(ForumPost.id)).group_by(ForumPost.user_id),
+        'forum_reply': select(ForumReply.user_id, func.count(ForumReply.id)).group_by(ForumReply.user_id),
+        'streak_max': select(RemajaPutri.id, RemajaPutri.longest_streak).where(RemajaPutri.longest_streak > 0),
+    }
+    UserCounter.query.delete()
+    for name, source in sources.items():
+        user_id_col, count_col = source.selected_columns
+        db.session.execute(insert(UserCounter).from_select(
+            ['user_id', 'name', 'value'], source.with_only_columns(user_id_col, literal(name), count_col)
+        ))
+
+@app.cli.command('rebuild-streaks')
+def rebuild_streaks_command():
+    """Menghitung ulang streak TTD semua pengguna dari riwayat log (diproses sebagai array)."""
+    started = time.perf_counter()
+    updated = rebuild_streaks()
+    db.session.commit()
+    click.echo(f"Streak {updated} pengguna dihitung ulang dalam {time.perf_counter() - started:.2f} detik.")
+
+@app.cli.command('bench-adherence')
+@click.option('--users', default=100000, help='Jumlah pengguna sintetis.')
+@click.option('--days', default=365, help='Panjang periode dalam hari.')
+@click.option('--seed', default=0, help='Seed generator data sintetis.')
+def bench_adherence(users, days, seed):
+    """Mengukur mesin kepatuhan dengan data sintetis (tanpa database): jadwal acak dan ~70% dosis diminum."""
+    rng = np.random.default_rng(seed)
+    period_end = np.datetime64(datetime.utcnow().date(), 'D').astype(np.int64)
+    period_start = period_end - days + 1
+    user_ids = np.arange(1, users + 1)
+    masks = rng.integers(1, 128, size=users)
+    start_days = period_start + rng.integers(0, days, size=users) * (rng.random(users) < 0.3)
+    cohorts = start_days.astype('datetime64[D]').astype('datetime64[M]').astype(str)
+
+    # Log dibangkitkan dari matriks jadwal yang sama lalu diambil acak, seperti riwayat DailyLog
+    scheduled = adherence.expected_doses(masks, start_days, period_start, days)
+    log_index, log_offset = np.nonzero(scheduled & (rng.random(scheduled.shape, dtype=np.float32) < 0.7))
+    del scheduled
+    click.echo(f"{users} pengguna x {days} hari, {len(log_index)} log 'Diminum'")
+
+    started = time.perf_counter()
+    result = adherence.compute_adherence(
+        user_ids, masks, start_days, user_ids[log_index], period_start + log_offset,
+        period_start, period_end, cohorts
+    )
+    elapsed = time.perf_counter() - started
+    click.echo(f"Kepatuhan keseluruhan {result['overall_ratio']:.3f}, {len(result['week_starts'])} minggu, "
+               f"{len(result['cohorts'])} kohort")
+    click.echo(f"Dihitung dalam {elapsed:.2f} detik ({users / elapsed:,.0f} pengguna/detik).")
+
+@app.cli.command('compute-adherence')
+def compute_adherence():
+    """Menghitung laporan kepatuhan untuk halaman laporan admin; dijadwalkan tiap jam lewat cron."""
+    started = time.perf_counter()
+    report = build_adherence_report()
+    db.session.merge(ReportSnapshot(name='adherence', data=report, computed_at=datetime.utcnow()))
+    db.session.commit()
+    click.echo(f"Kepatuhan {report['scheduled_users']} pengguna terjadwal dihitung dalam {time.perf_counter() - started:.2f} detik.")
+
+@app.cli.command('score-anemia-risk')
+def score_anemia_risk():
+    """Menghitung skor risiko anemia semua pengguna; dijadwalkan tiap malam lewat cron."""
+    started = time.perf_counter()
+    counts = score_all_users()
+    db.session.commit()
+    summary = ', '.join(f"{label}: {counts.get(label, 0)}" for label in (risk.HIGH, risk.MEDIUM, risk.LOW))
+    click.echo(f"Skor risiko {sum(counts.values())} pengguna dihitung dalam {time.perf_counter() - started:.2f} detik ({summary}).")
+
+@app.cli.command('evaluate-badges')
+@click.option('--rebuild-counters', is_flag=True, help='Hitung ulang penghitung aktivitas dari riwayat terlebih dahulu.')
+def evaluate_badges(rebuild_counters):
+    """Membuat baris Badge untuk aturan baru dan memberi lencana kepada semua pengguna yang memenuhi syarat."""
+    if rebuild_counters:
+        rebuild_user_counters()
+        click.echo(f"Penghitung dibangun ulang: {UserCounter.query.count()} baris.")
+
+    db.session.execute(insert_ignore(Badge), [
+        {'name': rule['name'], 'description': rule['description'], 'icon_name': rule['icon_name']} for rule in BADGE_RULES
+    ])
+    ids = dict(db.session.query(Badge.name, Badge.id).filter(Badge.name.in_([rule['name'] for rule in BADGE_RULES])).all())
+
+    now = datetime.utcnow()
+    for rule in BADGE_RULES:
+        result = db.session.execute(insert_ignore(UserBadge).from_select(
+            ['user_id', 'badge_id', 'earned_at'],
+            select(UserCounter.user_id, literal(ids[rule['name']]), literal(now)).where(
+                UserCounter.name == rule['counter'], UserCounter.value >= rule['threshold']
+            )
+        ))
+        click.echo(f"{rule['name']}: {max(result.rowcount, 0)} lencana baru")
+    db.session.commit()
+
 # --- PERBAIKAN KUNCI #1: HAPUS BLOK DI BAWAH INI ---
 # Blok if __name__ == '__main__': tidak diperlukan dan bisa menyebabkan konflik
 # if __name__ == '__main__':
@@ -0,0 +1,145 @@
+import json
+import logging
+import threading
+import time
+
+from cachetools import TLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """Backend cache di dalam proses: dibatasi jumlah entri (LRU) dan masa berlaku (TTL).
+
+    Tidak dibagi antar-proses, jadi hanya cocok untuk development atau server dengan satu worker.
+    """
+
+    def __init__(self, maxsize=2048):
+        # Nilai disimpan sebagai (payload, ttl) agar setiap entri bisa punya TTL sendiri
+        self._data = TLRUCache(maxsize=maxsize, ttu=lambda _key, value, now: now + value[1])
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisCache:
+    """Backend cache bersama untuk semua worker, memakai server Redis (atau yang kompatibel).
+
+    Jika Redis tidak bisa dihubungi, kesalahannya dicatat di log dan cache dianggap kosong
+    (get mengembalikan None, set/delete diabaikan) selama RETRY_AFTER detik, sehingga request
+    tetap dilayani langsung dari database.
+    """
+
+    RETRY_AFTER = 30
+
+    def __init__(self, client, prefix='dsc:', errors=(ConnectionError, TimeoutError)):
+        self.client = client
+        self.prefix = prefix
+        self.errors = errors
+        self._down_until = 0
+
+    @classmethod
+    def from_url(cls, url, prefix='dsc:'):
+        # redis hanya dibutuhkan jika backend ini dipakai
+        import redis
+        return cls(redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1),
+                   prefix=prefix, errors=(redis.RedisError,))
+
+    def _call(self, method, *args, **kwargs):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return method(*args, **kwargs)
+        except self.errors as e:
+            logger.warning("Redis tidak dapat diakses, cache dilewati selama %s detik: %s", self.RETRY_AFTER, e)
+            self._down_until = time.monotonic() + self.RETRY_AFTER
+            return None
+
+    def get(self, key):
+        value = self._call(self.client.get, self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key, value, ttl):
+        self._call(self.client.set, self.prefix + key, value, ex=int(ttl))
+
+    def delete(self, key):
+        self._call(self.client.delete, self.prefix + key)
+
+
+class ResponseCache:
+    """Cache payload JSON per namespace, misalnya 'article:12' atau 'articles'.
+
+    Setiap namespace punya nomor versi. Invalidasi cukup mengganti versi tersebut,
+    sehingga entri lama tidak terbaca lagi dan hilang sendiri saat TTL-nya habis.
+    """
+
+    VERSION_TTL = 24 * 60 * 60
+
+    def __init__(self, backend, default_ttl=300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+
+    def _new_version(self, namespace):
+        # Versi berbasis waktu tidak akan bertabrakan dengan versi lama walau kunci versi sempat terhapus
+        version = str(time.time_ns())
+        self.backend.set(f'{namespace}:ver', version, self.VERSION_TTL)
+        return version
+
+    def version(self, namespace):
+        return self.backend.get(f'{namespace}:ver') or self._new_version(namespace)
+
+    def _full_key(self, namespace, key):
+        return f'{namespace}:v{self.version(namespace)}:{key}'
+
+    def get(self, namespace, key):
+        cached = self.backend.get(self._full_key(namespace, key))
+        return json.loads(cached) if cached is not None else None
+
+    def set(self, namespace, key, value, ttl=None):
+        self.backend.set(self._full_key(namespace, key), json.dumps(value), ttl or self.default_ttl)
+
+    def get_or_set(self, namespace, key, builder, ttl=None):
+        """Mengembalikan payload dari cache, atau membangunnya dengan builder() lalu menyimpannya.
+
+        Payload None tidak disimpan, supaya data yang belum ada tidak ikut ter-cache.
+        """
+        cached = self.get(namespace, key)
+        if cached is not None:
+            return cached
+
+        value = builder()
+        if value is not None:
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self._new_version(namespace)
+
+
+def create_cache(config):
+    """Membuat ResponseCache sesuai CACHE_BACKEND ('memory' atau 'redis')."""
+    backend_name = config.get('CACHE_BACKEND', 'memory')
+    if backend_name == 'redis':
+        backend = RedisCache.from_url(config['CACHE_REDIS_URL'])
+    elif backend_name == 'memory':
+        if config.get('CACHE_WORKER_COUNT', 1) > 1:
+            raise ValueError("CACHE_BACKEND 'memory' tidak bisa dipakai dengan lebih dari satu worker: "
+                             "invalidasi tidak sampai ke worker lain. Gunakan CACHE_BACKEND=redis.")
+        backend = MemoryCache(maxsize=config.get('CACHE_MAX_ENTRIES', 2048))
+    else:
+        raise ValueError(f"CACHE_BACKEND tidak dikenal: {backend_name}")
+    return ResponseCache(backend, default_ttl=config.get('CACHE_DEFAULT_TTL', 300))
@@ -0,0 +1,69 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+
+import bcrypt as bcrypt_lib
+
+
+class HashingBusy(Exception):
+    """Antrean hashing password sudah penuh; permintaan sebaiknya ditolak dengan 503."""
+
+
+class PasswordHasher:
+    """Menjalankan hash & verifikasi bcrypt di pool thread yang ukurannya dibatasi.
+
+    Paling banyak `workers` hash berjalan bersamaan dan `max_queue` lainnya menunggu.
+    Jika keduanya penuh, HashingBusy langsung dilempar alih-alih membuat request mengantre
+    tanpa batas di belakang proses hashing yang mahal.
+
+    Pool dibuat per proses. Dengan worker gunicorn `sync` setiap proses hanya melayani satu request,
+    sehingga antrean tidak pernah penuh; pembatasan ini butuh worker gthread atau gevent.
+    """
+
+    def __init__(self, bcrypt, rounds=12, workers=2, max_queue=32):
+        self.bcrypt = bcrypt
+        self.rounds = rounds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(self.bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self._run(self.bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True jika hash dibuat dengan cost yang berbeda dari konfigurasi saat ini."""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+def _hash_one(password, rounds):
+    return bcrypt_lib.hashpw(password.encode('utf-8'), bcrypt_lib.gensalt(rounds)).decode('utf-8')
+
+
+def hash_passwords_parallel(passwords, rounds, processes=None):
+    """Meng-hash banyak password sekaligus dengan process pool, untuk impor akun massal.
+
+    Hasilnya kompatibel dengan Flask-Bcrypt dan urutannya sama dengan `passwords`.
+    """
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        chunksize = max(1, len(passwords) // ((processes or os.cpu_count() or 1) * 4))
+        return list(pool.map(_hash_one, passwords, repeat(rounds, len(passwords)), chunksize=chunksize))
@@ -0,0 +1,58 @@
+import numpy as np
+
+# Kadar Hb (g/dL). WHO: remaja putri anemia jika Hb < 12, anemia sedang jika < 11.
+# Komponen Hb sudah mulai naik sedikit di atas ambang anemia (HB_NORMAL).
+HB_NORMAL = 12.5
+HB_MODERATE_ANEMIA = 11.0
+HB_SEVERE = 10.0
+
+# Bobot komponen skor (total 100)
+WEIGHTS = {
+    'hb': 40,
+    'bmi': 15,
+    'adherence': 25,
+    'nutrition': 20,
+}
+# Nilai komponen jika datanya belum ada: risiko dianggap sedang, bukan nol
+MISSING_COMPONENT = 0.5
+
+HIGH = 'tinggi'
+MEDIUM = 'sedang'
+LOW = 'rendah'
+CATEGORY_THRESHOLDS = [(60, HIGH), (35, MEDIUM)]
+
+
+def risk_components(kadar_hb, bmi_zscore, adherence, nutrition):
+    """Mengubah setiap input menjadi komponen risiko 0..1 (NaN = data belum ada).
+
+    - kadar_hb: Hb terakhir; 0 pada HB_NORMAL ke atas, 1 pada HB_SEVERE ke bawah
+    - bmi_zscore: z-score IMT/U terakhir; 0 pada z >= -1, 1 pada kurus (z <= -2)
+    - adherence: rasio kepatuhan TTD 0..1
+    - nutrition: rata-rata porsi harian lauk hewani, sayur dan buah 0..1
+    """
+    kadar_hb = np.asarray(kadar_hb, dtype=float)
+    bmi_zscore = np.asarray(bmi_zscore, dtype=float)
+    with np.errstate(invalid='ignore'):
+        return {
+            'hb': np.clip((HB_NORMAL - kadar_hb) / (HB_NORMAL - HB_SEVERE), 0, 1),
+            'bmi': np.clip(-1 - bmi_zscore, 0, 1),
+            'adherence': np.clip(1 - np.asarray(adherence, dtype=float), 0, 1),
+            'nutrition': np.clip(1 - np.asarray(nutrition, dtype=float), 0, 1),
+        }
+
+
+def score_risk(kadar_hb, bmi_zscore, adherence, nutrition):
+    """Menghitung skor risiko anemia 0..100 dan kategorinya untuk array pengguna sekaligus.
+
+    Anemia sedang (Hb < HB_MODERATE_ANEMIA) selalu masuk kategori tinggi apa pun komponen lainnya.
+    """
+    components = risk_components(kadar_hb, bmi_zscore, adherence, nutrition)
+    score = sum(WEIGHTS[name] * np.where(np.isnan(value), MISSING_COMPONENT, value)
+                for name, value in components.items())
+
+    category = np.full(score.shape, LOW, dtype=object)
+    for threshold, label in reversed(CATEGORY_THRESHOLDS):
+        category[score >= threshold] = label
+    with np.errstate(invalid='ignore'):
+        category[np.asarray(kadar_hb, dtype=float) < HB_MODERATE_ANEMIA] = HIGH
+    return score, category
@@ -1,51 +1,192 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, messaging
-from app import app, db, RemajaPutri
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from app import app, db, RemajaPutri, DailyLog, ReminderRun
 
-# --- Inisialisasi Firebase Admin SDK ---
-cred_path = os.path.join(os.path.dirname(__file__), 'service-account-key.json')
-cred = credentials.Certificate(cred_path)
+# FCM menolak lebih dari 500 token dalam satu panggilan multicast
+FCM_BATCH_SIZE = 500
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
 
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-# ----------------------------------------
+REMINDER_TITLE = '🔔 Pengingat Harian DSC!'
+REMINDER_BODY = 'Jangan lupa catat aktivitas minum Tablet Tambah Darah (TTD) hari ini ya, Semangat Sehat! 💪'
 
-def send_daily_reminders():
-    print("Memulai pengiriman notifikasi pengingat harian...")
-    
-    with app.app_context():
-        users_with_tokens = RemajaPutri.query.filter(RemajaPutri.fcm_token.isnot(None)).all()
-        
-        if not users_with_tokens:
-            print("Tidak ada pengguna dengan token FCM. Proses selesai.")
-            return
+# Status hasil pengiriman per token
+SENT = 'sent'
+UNREGISTERED = 'unregistered'
+RETRY = 'retry'
+FAILED = 'failed'
+
+
+class FirebaseMessaging:
+    """Backend pengiriman melalui Firebase Cloud Messaging."""
 
-        tokens = [user.fcm_token for user in users_with_tokens]
-        
-        print(f"Menemukan {len(tokens)} token. Mencoba mengirim notifikasi...")
+    def __init__(self, cred_path):
+        import firebase_admin
+        from firebase_admin import credentials, messaging
 
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(cred_path))
+        self.messaging = messaging
+
+    def send_batch(self, tokens, title, body):
+        """Mengirim ke maksimal FCM_BATCH_SIZE token, mengembalikan status untuk setiap token."""
+        messaging = self.messaging
         message = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title='🔔 Pengingat Harian DSC!',
-                body='Jangan lupa catat aktivitas minum Tablet Tambah Darah (TTD) hari ini ya, Semangat Sehat! 💪'
-            ),
+            notification=messaging.Notification(title=title, body=body),
             tokens=tokens,
         )
+        response = messaging.send_each_for_multicast(message)
 
-        try:
-            # Pastikan penulisan nama fungsi sudah benar:
-            response = messaging.send_each_for_multicast(message)
-            print(f'Total notifikasi yang dikirim: {len(response.responses)}')
-            print(f'Berhasil: {response.success_count}, Gagal: {response.failure_count}')
-            
-            if response.failure_count > 0:
-                for i, send_response in enumerate(response.responses):
-                    if not send_response.success:
-                        print(f'   Error pada token ke-{i+1}: {send_response.exception}')
+        results = []
+        for send_response in response.responses:
+            error = send_response.exception
+            if send_response.success:
+                results.append(SENT)
+            elif isinstance(error, messaging.UnregisteredError):
+                results.append(UNREGISTERED)
+            elif isinstance(error, (messaging.QuotaExceededError, messaging.UnavailableError)):
+                results.append(RETRY)
+            else:
+                results.append(FAILED)
+        return results
+
+
+class FakeMessaging:
+    """Backend tiruan untuk menjalankan dispatcher secara lokal tanpa jaringan."""
 
+    def __init__(self, unregistered_tokens=(), transient_failures=0):
+        self.unregistered_tokens = set(unregistered_tokens)
+        self.transient_failures = transient_failures
+        self.sent_tokens = []
+        self.calls = 0
+
+    def send_batch(self, tokens, title, body):
+        self.calls += 1
+        if len(tokens) > FCM_BATCH_SIZE:
+            raise ValueError(f"Maksimal {FCM_BATCH_SIZE} token per panggilan")
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            raise ConnectionError("Gangguan jaringan (simulasi)")
+
+        results = []
+        for token in tokens:
+            if token in self.unregistered_tokens:
+                results.append(UNREGISTERED)
+            else:
+                self.sent_tokens.append(token)
+                results.append(SENT)
+        return results
+
+
+def iter_token_batches(query, batch_size=FCM_BATCH_SIZE):
+    """Membaca token dari query per batch, berurutan berdasarkan id (keyset), tanpa memuat semuanya."""
+    last_id = 0
+    while True:
+        rows = query.with_entities(RemajaPutri.id, RemajaPutri.fcm_token).filter(
+            RemajaPutri.id > last_id
+        ).order_by(RemajaPutri.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield [row.fcm_token for row in rows]
+        last_id = rows[-1].id
+
+
+def send_with_retry(backend, tokens):
+    """Mengirim satu batch; token yang gagal sementara dicoba ulang dengan backoff eksponensial."""
+    outcome = {}
+    pending = list(tokens)
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        try:
+            results = backend.send_batch(pending, REMINDER_TITLE, REMINDER_BODY)
         except Exception as e:
-            print(f"Terjadi error saat mengirim notifikasi: {e}")
+            print(f"   Percobaan {attempt + 1} gagal untuk {len(pending)} token: {e}")
+            continue
+
+        retry_tokens = []
+        for token, result in zip(pending, results):
+            if result == RETRY:
+                retry_tokens.append(token)
+            else:
+                outcome[token] = result
+        pending = retry_tokens
+        if not pending:
+            break
+
+    for token in pending:
+        outcome[token] = FAILED
+    return outcome
+
+
+def prune_tokens(tokens):
+    """Menghapus token yang dilaporkan FCM sudah tidak terdaftar."""
+    if not tokens:
+        return 0
+    pruned = RemajaPutri.query.filter(RemajaPutri.fcm_token.in_(tokens)).update(
+        {RemajaPutri.fcm_token: None}, synchronize_session=False
+    )
+    db.session.commit()
+    return pruned
+
+
+def target_users_query(today=None):
+    """Pengguna ber-token yang dijadwalkan minum TTD hari ini dan belum mencatat log hari ini."""
+    today = today or datetime.utcnow().date()
+    logged_today = db.session.query(DailyLog.id).filter(
+        DailyLog.user_id == RemajaPutri.id, DailyLog.tanggal == today
+    ).exists()
+    return RemajaPutri.query.filter(
+        RemajaPutri.fcm_token.isnot(None),
+        RemajaPutri.jadwal_ttd_mask.op('&')(1 << today.weekday()) != 0,
+        ~logged_today
+    )
+
+
+def send_daily_reminders(backend, batch_size=FCM_BATCH_SIZE, max_workers=MAX_WORKERS):
+    print("Memulai pengiriman notifikasi pengingat harian...")
+
+    with app.app_context():
+        run = ReminderRun(
+            started_at=datetime.utcnow(), batch_count=0, token_count=0,
+            success_count=0, failure_count=0, pruned_count=0
+        )
+        in_flight = set()
+
+        def collect(futures):
+            for future in futures:
+                outcome = future.result()
+                run.success_count += sum(1 for result in outcome.values() if result == SENT)
+                run.failure_count += sum(1 for result in outcome.values() if result != SENT)
+                run.pruned_count += prune_tokens([token for token, result in outcome.items() if result == UNREGISTERED])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for tokens in iter_token_batches(target_users_query(), batch_size):
+                run.batch_count += 1
+                run.token_count += len(tokens)
+                in_flight.add(pool.submit(send_with_retry, backend, tokens))
+
+                # Batasi jumlah batch yang menunggu agar memori tetap kecil
+                if len(in_flight) >= max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(in_flight)
+
+        run.finished_at = datetime.utcnow()
+        db.session.add(run)
+        db.session.commit()
+
+        if not run.token_count:
+            print("Tidak ada pengguna yang perlu diingatkan hari ini. Proses selesai.")
+        else:
+            print(f'Total token: {run.token_count} dalam {run.batch_count} batch')
+            print(f'Berhasil: {run.success_count}, Gagal: {run.failure_count}, Token dihapus: {run.pruned_count}')
+        return run
+
 
 if __name__ == '__main__':
-    send_daily_reminders()
\ No newline at end of file
+    cred_path = os.path.join(os.path.dirname(__file__), 'service-account-key.json')
+    send_daily_reminders(FirebaseMessaging(cred_path))
@@ -0,0 +1,53 @@
+import os
+import sys
+
+# app.py membaca konfigurasi dari environment saat di-import. DATABASE_URL sengaja ditimpa
+# agar test tidak pernah menyentuh database sungguhan; set TEST_DATABASE_URL untuk MySQL.
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+os.environ['SECRET_KEY'] = 'kunci-rahasia-khusus-test-minimal-32-byte'
+os.environ['CACHE_BACKEND'] = 'memory'
+os.environ['WEB_CONCURRENCY'] = '1'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import app as app_module
+from cache import MemoryCache
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app = app_module.app
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        app_module.db.create_all()
+        yield flask_app
+        app_module.db.session.remove()
+        app_module.db.drop_all()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(app):
+    # Cache kosong di setiap test, supaya query yang membangun isi cache ikut dijalankan
+    app_module.response_cache.backend = MemoryCache()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as admin_session:
+        admin_session['admin_id'] = 1
+        admin_session['admin_username'] = 'admin'
+        admin_session['admin_role'] = 'superadmin'
+    return client
+
+
+def auth_header(user_id):
+    return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id))}
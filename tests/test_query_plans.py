@@ -0,0 +1,214 @@
+"""Rencana eksekusi query yang benar-benar dikirim endpoint utama.
+
+SQL ditangkap lewat event before_cursor_execute selama endpoint dipanggil dengan test client,
+lalu setiap SELECT/UPDATE/DELETE di-EXPLAIN. Test gagal jika ada full table scan yang tidak
+diizinkan secara eksplisit. Default-nya SQLite in-memory; set TEST_DATABASE_URL untuk MySQL.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+import send_reminders
+from app import (
+    db, RemajaPutri, DailyLog, NutritionLog, HealthScreening, Question, Article,
+    ForumTopic, ForumPost, ForumReply, award_points, refresh_leaderboard_entry
+)
+from conftest import auth_header
+
+USERS = 40
+DAYS = 30
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+@contextmanager
+def captured_sql():
+    """Mengumpulkan (statement, parameters) yang dikirim ke database di dalam blok ini."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def explain(statement, parameters):
+    dialect_name = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect_name == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.exec_driver_sql(prefix + statement, parameters)]
+
+
+def scanned_table(plan_row):
+    """Nama tabel yang dibaca penuh oleh baris rencana ini, atau None."""
+    if db.engine.dialect.name == 'sqlite':
+        # "SCAN <tabel> ..." adalah full scan; "SEARCH <tabel> USING INDEX ..." tidak
+        detail = plan_row.get('detail', '').split()
+        return detail[1] if len(detail) > 1 and detail[0] == 'SCAN' else None
+    # MySQL menandai full scan dengan type ALL (tabel) atau index (seluruh index)
+    return plan_row.get('table') if plan_row.get('type') in ('ALL', 'index') else None
+
+
+def is_range_seek(plan_row):
+    """True jika index dipakai untuk mencari rentang (misalnya mulai dari cursor), bukan hanya kesamaan."""
+    if db.engine.dialect.name == 'sqlite':
+        detail = plan_row.get('detail', '')
+        return detail.startswith('SEARCH') and ('<' in detail or '>' in detail)
+    return plan_row.get('type') == 'range'
+
+
+def assert_no_full_scans(statements, allowed_tables=()):
+    assert statements, "Tidak ada query yang tertangkap"
+    failures = []
+    for statement, parameters in statements:
+        for row in explain(statement, parameters):
+            table = scanned_table(row)
+            if table and table not in allowed_tables:
+                failures.append(f"{table}: {row}\n    {statement}")
+    assert not failures, "Full table scan:\n" + "\n".join(failures)
+
+
+@pytest.fixture(scope='module')
+def users(app):
+    """Pengguna dengan riwayat log, gizi, skrining, pertanyaan dan forum; (id, header JWT) per pengguna."""
+    today = datetime.utcnow().date()
+    users = [RemajaPutri(username=f'plan{index}', password='rahasia1') for index in range(USERS)]
+    for index, user in enumerate(users):
+        # Dijadwalkan setiap hari, supaya selalu ada target pengingat hari ini
+        user.jadwal_ttd = '0,1,2,3,4,5,6'
+        user.fcm_token = f'token{index}'
+    db.session.add_all(users)
+    db.session.flush()
+
+    topic = ForumTopic(name='Gizi')
+    db.session.add(topic)
+    db.session.add(Article(title='Artikel', content='Isi artikel'))
+    db.session.flush()
+    for user in users:
+        award_points(user.id, user.id * 10, 'log_ttd')
+        for day in range(1, DAYS + 1):
+            tanggal = today - timedelta(days=day)
+            db.session.add(DailyLog(user_id=user.id, tanggal=tanggal, status='Diminum' if day % 3 else 'Lupa'))
+            db.session.add(NutritionLog(user_id=user.id, tanggal=tanggal, sayur=True))
+        db.session.add(HealthScreening(user_id=user.id, tanggal_skrining=today - timedelta(days=7)))
+        db.session.add(Question(user_id=user.id, question_text='Apakah TTD aman?'))
+        post = ForumPost(title='Halo', content='Salam kenal', user_id=user.id, topic_id=topic.id)
+        db.session.add(post)
+        db.session.flush()
+        db.session.add(ForumReply(content='Halo juga', user_id=user.id, post_id=post.id))
+    db.session.commit()
+    for user in users:
+        refresh_leaderboard_entry(user.id)
+    return [(user.id, auth_header(user.id)) for user in users]
+
+
+def test_add_log_create_and_update(client, users):
+    _, headers = users[0]
+    with captured_sql() as statements:
+        assert client.post('/log', json={'status': 'Lupa'}, headers=headers).status_code == 201
+        assert client.post('/log', json={'status': 'Diminum'}, headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+
+
+def test_get_logs_pages_by_cursor(client, users):
+    _, headers = users[1]
+    with captured_sql() as statements:
+        first = client.get('/logs?limit=10', headers=headers).get_json()
+        response = client.get(f"/logs?limit=10&cursor={first['next_cursor']}", headers=headers)
+        assert response.status_code == 200
+        assert client.get('/logs?from=2024-01-01&to=2024-12-31', headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+    # Halaman berikutnya mulai dari cursor di index (user_id, tanggal), bukan dari log terbaru
+    assert any(is_range_seek(row) for row in explain(*statements[1]))
+
+
+def test_today_nutrition_log(client, users):
+    _, headers = users[2]
+    with captured_sql() as statements:
+        assert client.get('/nutrition-log/today', headers=headers).status_code == 200
+        assert client.post('/nutrition-log/today', json={'sayur': True}, headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+
+
+def test_sync(client, users):
+    _, headers = users[3]
+    today = datetime.utcnow().date()
+    payload = {
+        'daily_logs': [
+            {'key': 'plan-1', 'tanggal': (today - timedelta(days=DAYS + 1)).isoformat(), 'status': 'Lupa'},
+            {'key': 'plan-2', 'tanggal': (today - timedelta(days=1)).isoformat(), 'status': 'Diminum'},
+            {'key': 'plan-3', 'tanggal': today.isoformat(), 'status': 'Diminum'},
+        ],
+        'nutrition_logs': [{'key': 'plan-4', 'tanggal': today.isoformat(), 'buah': True}],
+    }
+    with captured_sql() as statements:
+        assert client.post('/sync', json=payload, headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+
+
+@pytest.mark.parametrize('path', [
+    '/screening', '/changes', '/questions', '/forum/posts/in-topic/1', '/forum/post/1',
+])
+def test_per_user_reads(client, users, path):
+    _, headers = users[4]
+    with captured_sql() as statements:
+        assert client.get(path, headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+
+
+def test_leaderboard(client, users, monkeypatch):
+    # Cache peringkat teratas dibuat kecil agar peringkat pengguna dihitung lewat query count
+    monkeypatch.setattr(app_module, 'LEADERBOARD_CACHE_SIZE', 5)
+    _, headers = users[USERS // 2]
+    with captured_sql() as statements:
+        assert client.get('/leaderboard', headers=headers).status_code == 200
+    # Peringkat teratas dibaca berurutan dari index (points, id) dan berhenti setelah LIMIT
+    assert_no_full_scans(statements, allowed_tables=('remaja_putri',))
+
+    # Peringkat teratas sudah di-cache; tetangga dan peringkat pengguna harus mencari di index
+    with captured_sql() as statements:
+        assert client.get('/leaderboard?scope=around_me', headers=headers).status_code == 200
+    assert_no_full_scans(statements)
+
+
+def test_badges(client, users):
+    _, headers = users[5]
+    with captured_sql() as statements:
+        assert client.get('/badges', headers=headers).status_code == 200
+    # Semua lencana ditampilkan, jadi tabel badge (sebanyak BADGE_RULES) memang dibaca seluruhnya
+    assert_no_full_scans(statements, allowed_tables=('badge',))
+
+
+def test_me_summary(client, users):
+    _, headers = users[6]
+    with captured_sql() as statements:
+        assert client.get('/me/summary', headers=headers).status_code == 200
+    # Artikel terbaru dibaca berurutan dari index created_at dan berhenti setelah LIMIT
+    assert_no_full_scans(statements, allowed_tables=('article',))
+
+
+def test_admin_dashboard(admin_client, users):
+    with captured_sql() as statements:
+        assert admin_client.get('/admin/dashboard').status_code == 200
+    assert_no_full_scans(statements)
+
+
+def test_manage_app_users(admin_client, users):
+    with captured_sql() as statements:
+        assert admin_client.get('/admin/app-users').status_code == 200
+    # Halaman ini memang menelusuri semua pengguna per halaman; daily_log harus dicari lewat index
+    assert_no_full_scans(statements, allowed_tables=('remaja_putri',))
+
+
+def test_reminder_targets(app, users):
+    with captured_sql() as statements:
+        batches = list(send_reminders.iter_token_batches(send_reminders.target_users_query(), batch_size=15))
+    assert batches
+    assert_no_full_scans(statements)
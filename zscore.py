@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+
+# Tabel LMS WHO Growth Reference 2007 (IMT menurut umur, 5-19 tahun), satu baris per bulan umur
+REFERENCE_FILES = {
+    'bmi_for_age': os.path.join(os.path.dirname(__file__), 'data', 'who2007_bmi_for_age.csv'),
+}
+
+# Kode jenis kelamin mengikuti WHO: 1 = laki-laki, 2 = perempuan
+MALE = 1
+FEMALE = 2
+
+# Titik acuan dari tabel z-score WHO 2007 yang dipublikasikan: (indikator, jenis kelamin, umur bulan, {z: IMT})
+PUBLISHED_REFERENCE = [
+    ('bmi_for_age', MALE, 61, {-3: 12.1, -2: 13.0, -1: 14.1, 0: 15.3, 1: 16.6, 2: 18.3, 3: 20.2}),
+    ('bmi_for_age', MALE, 120, {-3: 12.8, -2: 13.7, -1: 14.9, 0: 16.4, 1: 18.5, 2: 21.4, 3: 26.1}),
+    ('bmi_for_age', MALE, 228, {-3: 15.9, -2: 17.6, -1: 19.6, 0: 22.2, 1: 25.4, 2: 29.7, 3: 35.5}),
+    ('bmi_for_age', FEMALE, 61, {-3: 11.8, -2: 12.7, -1: 13.9, 0: 15.2, 1: 16.9, 2: 18.9, 3: 21.3}),
+    ('bmi_for_age', FEMALE, 120, {-3: 12.4, -2: 13.5, -1: 14.8, 0: 16.6, 1: 19.0, 2: 22.6, 3: 28.4}),
+    ('bmi_for_age', FEMALE, 180, {-3: 14.4, -2: 15.9, -1: 17.8, 0: 20.2, 1: 23.5, 2: 28.2, 3: 35.5}),
+    ('bmi_for_age', FEMALE, 228, {-3: 14.7, -2: 16.5, -1: 18.7, 0: 21.4, 1: 25.0, 2: 29.7, 3: 36.2}),
+]
+
+_tables = {}
+
+
+def load_reference(indicator):
+    """Memuat tabel LMS sekali saja ke array NumPy: {sex: (umur_bulan, L, M, S)}."""
+    if indicator not in _tables:
+        if indicator not in REFERENCE_FILES:
+            raise ValueError(f"Indikator tidak dikenal: {indicator}")
+        raw = np.loadtxt(REFERENCE_FILES[indicator], delimiter=',', skiprows=1)
+        table = {}
+        for sex in (MALE, FEMALE):
+            rows = raw[raw[:, 0] == sex]
+            rows = rows[np.argsort(rows[:, 1])]
+            table[sex] = tuple(rows[:, i].copy() for i in range(1, 5))
+        _tables[indicator] = table
+    return _tables[indicator]
+
+
+def lms_at(indicator, age_in_months, sex):
+    """Nilai L, M, S hasil interpolasi linear menurut umur (bulan); di luar rentang tabel hasilnya NaN."""
+    table = load_reference(indicator)
+    age = np.asarray(age_in_months, dtype=float)
+    sex = np.broadcast_to(np.asarray(sex), age.shape)
+    L = np.full(age.shape, np.nan)
+    M = np.full(age.shape, np.nan)
+    S = np.full(age.shape, np.nan)
+    for code, (ages, l_values, m_values, s_values) in table.items():
+        mask = (sex == code) & (age >= ages[0]) & (age <= ages[-1])
+        if mask.any():
+            L[mask] = np.interp(age[mask], ages, l_values)
+            M[mask] = np.interp(age[mask], ages, m_values)
+            S[mask] = np.interp(age[mask], ages, s_values)
+    return L, M, S
+
+
+def _value_at(L, M, S, z):
+    return M * (1 + L * S * z) ** (1 / L)
+
+
+def zscores(indicator, measurement, age_in_months, sex):
+    """Menghitung z-score LMS untuk array pengukuran sekaligus.
+
+    Di luar +/-3 SD dipakai penyesuaian WHO (jarak antara SD2 dan SD3 sebagai satuan),
+    sama seperti WHO AnthroPlus. Umur/jenis kelamin di luar tabel menghasilkan NaN.
+    """
+    x = np.asarray(measurement, dtype=float)
+    L, M, S = lms_at(indicator, age_in_months, sex)
+    L, M, S, x = np.broadcast_arrays(L, M, S, x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = ((x / M) ** L - 1) / (L * S)
+
+        sd3_pos = _value_at(L, M, S, 3)
+        sd3_neg = _value_at(L, M, S, -3)
+        above = z > 3
+        below = z < -3
+        z = np.where(above, 3 + (x - sd3_pos) / (sd3_pos - _value_at(L, M, S, 2)), z)
+        z = np.where(below, -3 + (x - sd3_neg) / (_value_at(L, M, S, -2) - sd3_neg), z)
+    return z
+
+
+def get_zscore(indicator, measurement, age_in_months, sex):
+    """Z-score untuk satu pengukuran; None jika umur di luar rentang tabel referensi."""
+    z = float(zscores(indicator, measurement, age_in_months, sex))
+    return None if np.isnan(z) else z
+
+
+def verify_reference(tolerance=0.1):
+    """Membandingkan hasil mesin dengan titik acuan WHO; mengembalikan daftar selisih yang melebihi toleransi."""
+    mismatches = []
+    for indicator, sex, age, points in PUBLISHED_REFERENCE:
+        expected = np.array(list(points.keys()), dtype=float)
+        actual = zscores(indicator, list(points.values()), age, sex)
+        for want, got, value in zip(expected, actual, points.values()):
+            if not abs(got - want) <= tolerance:
+                mismatches.append((indicator, sex, age, value, want, float(got)))
+    return mismatches